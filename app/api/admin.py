@@ -0,0 +1,29 @@
+from fastapi import HTTPException, Header
+from app.core.config import settings
+from app.services.retrieval_backend import RetrievalBackend
+from typing import Optional
+import asyncio
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+def require_admin_key(x_admin_key: Optional[str] = Header(default=None)):
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled - set ADMIN_API_KEY to enable them")
+    if not hmac.compare_digest((x_admin_key or "").encode("utf-8"), settings.admin_api_key.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+async def reload_retrieval_indexes(retrieval_service: RetrievalBackend, wait: bool):
+    if not wait:
+        if not retrieval_service.startReload():
+            raise HTTPException(status_code=409, detail="Index reload already in progress")
+        return {"status": "started", "indexVersion": retrieval_service.indexVersion}
+    try:
+        result = await asyncio.to_thread(retrieval_service.reloadIndexes)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Index reload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {str(e)}")
+    return {"status": "swapped", **result}
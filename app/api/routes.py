@@ -1,16 +1,31 @@
 from fastapi import APIRouter, HTTPException, Depends
+from app.api.admin import reload_retrieval_indexes, require_admin_key
+from app.core.config import settings
 from app.models.schemas import CaseAnalysisRequest, CaseAnalysisResponse, HealthResponse
 from app.services.legal_bert import LegalBertService
-from app.services.rag_service import RAGService
+from app.services.retrieval_backend import createRetrievalService
 from app.services.gemini_service import GeminiService
+from app.services.keyword_query import LocalQueryGenerator
+from app.services.pipeline import CaseAnalysisPipeline, queryGenerationMode
+from app.services.semantic_cache import SemanticCaseCache
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 legal_bert_service = LegalBertService()
-rag_service = RAGService()
+rag_service = createRetrievalService()
 gemini_service = GeminiService()
+query_generator = LocalQueryGenerator(rag_service, settings.local_query_max_terms, settings.local_query_idf_max_docs)
+analysis_pipeline = CaseAnalysisPipeline(legal_bert_service, rag_service, gemini_service, query_generator)
+semantic_cache = None
+if settings.semantic_cache_enabled and rag_service.encoder != "placeholder":
+    semantic_cache = SemanticCaseCache(
+        settings.semantic_cache_max_entries,
+        settings.semantic_cache_threshold,
+        ttlSeconds=settings.semantic_cache_ttl_seconds
+    )
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -36,60 +51,99 @@ async def health_check():
             error=str(e)
         )
 
+async def find_near_duplicate(request: CaseAnalysisRequest, index_generation):
+    try:
+        case_vector = (await asyncio.to_thread(rag_service.encodeQueries, [request.caseText]))[0]
+    except Exception as e:
+        logger.error(f"Semantic cache encoding failed: {str(e)}")
+        return None, None, None
+    variant = (queryGenerationMode(request.useQueryGeneration), index_generation.version)
+    match = None if request.forceFresh or not request.useLLMCache else semantic_cache.lookup(case_vector, variant)
+    return case_vector, variant, match
+
+def build_case_response(request: CaseAnalysisRequest, prediction, evaluation_result) -> CaseAnalysisResponse:
+    search_query = evaluation_result.get("ragSearchQuery", request.caseText)
+    support_chunks = evaluation_result.get("support", {})
+    return CaseAnalysisResponse(
+        initialVerdict=prediction.verdict,
+        initialConfidence=prediction.confidence,
+        finalVerdict=evaluation_result.get("finalVerdictByGemini"),
+        verdictChanged=evaluation_result.get("verdictChanged") == "changed",
+        searchQuery=search_query,
+        geminiExplanation=evaluation_result.get("geminiOutput"),
+        supportingSources=support_chunks,
+        analysisLogs=evaluation_result
+    )
+
 @router.post("/analyze-case", response_model=CaseAnalysisResponse)
 async def analyze_case(request: CaseAnalysisRequest):
     try:
         logger.info(f"Analyzing case with text length: {len(request.caseText)}")
         
-        initial_verdict = legal_bert_service.predictVerdict(request.caseText)
-        confidence = legal_bert_service.getConfidence(request.caseText)
-        
-        logger.info(f"Initial verdict: {initial_verdict}, confidence: {confidence}")
+        index_generation = rag_service.generation
+        case_vector, variant, match = None, None, None
+        if semantic_cache is not None:
+            case_vector, variant, match = await find_near_duplicate(request, index_generation)
+            if match is not None and settings.semantic_cache_mode == "return":
+                cached, similarity = match
+                logger.info(f"Serving near-duplicate analysis from semantic cache (similarity {similarity:.4f})")
+                response = CaseAnalysisResponse.model_validate(cached)
+                response.analysisLogs = {**response.analysisLogs, "semanticCache": {"hit": True, "served": True, "similarity": similarity}}
+                return response
         
-        evaluation_result = gemini_service.evaluateCaseWithGemini(
-            inputText=request.caseText,
-            modelVerdict=initial_verdict,
-            confidence=confidence,
-            retrieveFn=rag_service,
-            geminiQueryModel=gemini_service if request.useQueryGeneration else None
+        prediction, evaluation_result = await analysis_pipeline.run(
+            request.caseText, request.useQueryGeneration, index_generation, request.useLLMCache
         )
         
-        logger.info(f"Retrieved support chunks from RAG system")
-        search_query = evaluation_result.get("ragSearchQuery", request.caseText)
-        
+        logger.info(f"Initial verdict: {prediction.verdict}, confidence: {prediction.confidence}")
         logger.info(f"Gemini evaluation completed. Final verdict: {evaluation_result.get('finalVerdictByGemini')}")
         
-        support_chunks = evaluation_result.get("support", {})
-        return CaseAnalysisResponse(
-            initialVerdict=initial_verdict,
-            initialConfidence=confidence,
-            finalVerdict=evaluation_result.get("finalVerdictByGemini"),
-            verdictChanged=evaluation_result.get("verdictChanged") == "changed",
-            searchQuery=search_query,
-            geminiExplanation=evaluation_result.get("geminiOutput"),
-            supportingSources=support_chunks,
-            analysisLogs=evaluation_result
-        )
+        response = build_case_response(request, prediction, evaluation_result)
+        if case_vector is not None:
+            if match is not None:
+                response.analysisLogs["semanticCache"] = {"hit": True, "served": False, "similarity": match[1]}
+            if not evaluation_result.get("error"):
+                semantic_cache.store(case_vector, variant, response.model_dump())
+        return response
         
     except Exception as e:
         logger.error(f"Error analyzing case: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.post("/admin/reload-indexes", dependencies=[Depends(require_admin_key)])
+async def reload_indexes(wait: bool = True):
+    return await reload_retrieval_indexes(rag_service, wait)
+
 @router.get("/models/status")
 async def get_models_status():
     try:
         status = {
             "legalBert": {
                 "loaded": legal_bert_service.is_model_loaded(),
-                "device": legal_bert_service.get_device()
+                "device": legal_bert_service.get_device(),
+                "backend": legal_bert_service.get_backend(),
+                "batching": legal_bert_service.getBatchingStats(),
+                "predictionCache": legal_bert_service.getCacheStats()
             },
             "ragIndexes": {
                 "loaded": rag_service.areIndexesLoaded(),
-                "indexCount": len(rag_service.getLoadedIndexes())
+                "indexCount": len(rag_service.getLoadedIndexes()),
+                "indexVersion": rag_service.indexVersion,
+                "loading": rag_service.getLoadStats(),
+                "queryEncoder": rag_service.getEncoderStats(),
+                "batching": rag_service.getBatchingStats(),
+                "retrievalCache": rag_service.getRetrievalCacheStats()
+            },
+            "queryGeneration": {
+                "mode": settings.query_generation_mode,
+                "local": query_generator.getStats()
             },
             "gemini": {
-                "configured": gemini_service.is_configured()
-            }
+                "configured": gemini_service.is_configured(),
+                "concurrency": gemini_service.getConcurrencyStats(),
+                "responseCache": gemini_service.getResponseCacheStats()
+            },
+            "semanticCache": semantic_cache.getStats() if semantic_cache is not None else {"enabled": False}
         }
         return status
     except Exception as e:
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.api.admin import reload_retrieval_indexes, require_admin_key
+from app.models.schemas import ShardTextsRequest
+from app.services.rag_service import RAGService
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+rag_service = RAGService()
+
+@router.get("/status")
+async def shard_status():
+    generation = rag_service.generation
+    return {
+        "domains": list(generation.indexes.keys()),
+        "indexVersion": generation.version,
+        "queryEncoder": rag_service.getEncoderStats(),
+        "batching": rag_service.getBatchingStats(),
+        "retrievalCache": rag_service.getRetrievalCacheStats()
+    }
+
+@router.post("/retrieve")
+async def retrieve(request: ShardTextsRequest):
+    generation = rag_service.generation
+    try:
+        rows = await asyncio.gather(*(rag_service.retrieveHitsAsync(text, generation) for text in request.texts))
+    except Exception as e:
+        logger.error(f"Shard retrieval failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Retrieval failed: {str(e)}")
+    results = []
+    for hits in rows:
+        support = rag_service.supportFromHits(hits, generation)
+        results.append({
+            name: [[idx, score, chunk] for (idx, score), chunk in zip(domainHits, support[name])]
+            for name, domainHits in hits.items()
+        })
+    domains = dict.fromkeys(name for hits in rows for name in hits)
+    return {
+        "indexVersion": generation.version,
+        "higherIsBetter": {name: rag_service.higherIsBetter(name, generation) for name in domains},
+        "results": results
+    }
+
+@router.post("/encode")
+async def encode(request: ShardTextsRequest):
+    if rag_service.encoder == "placeholder":
+        raise HTTPException(status_code=503, detail="Query encoder not loaded on this shard")
+    vectors = await asyncio.to_thread(rag_service.encodeQueries, request.texts)
+    return {"vectors": vectors.tolist()}
+
+@router.post("/admin/reload-indexes", dependencies=[Depends(require_admin_key)])
+async def reload_indexes(wait: bool = True):
+    return await reload_retrieval_indexes(rag_service, wait)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,13 +8,63 @@ class Settings(BaseSettings):
     api_title: str = "Legal RAG Analysis API"
     api_version: str = "1.0.0"
     debug: bool = False
+    admin_api_key: str = os.getenv("ADMIN_API_KEY", "")
     
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     gemini_model: str = "gemini-2.5-flash"
+    gemini_max_concurrency: int = 32
+    gemini_timeout_seconds: float = 60.0
+    gemini_use_native_async: bool = True
+    gemini_generation_config: Dict[str, Any] = {}
+    gemini_prompt_packing: bool = True
+    gemini_prompt_reference_tokens: int = 3000
+    gemini_prompt_chunk_tokens: int = 300
+    gemini_prompt_case_tokens: int = 0
+    query_generation_mode: str = "gemini"
+    local_query_max_terms: int = 12
+    local_query_idf_max_docs: int = 5000
+
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: float = 604800.0
+    llm_cache_max_entry_bytes: int = 262144
+    llm_cache_path: str = ""
 
     legal_bert_model_path: str = os.getenv("LEGAL_BERT_MODEL_PATH", "./models/legalbert_model")
+    legal_bert_backend: str = "torch"
+    legal_bert_onnx_intra_op_threads: int = 0
+    legal_bert_long_document_mode: bool = False
+    legal_bert_window_overlap: int = 128
+    legal_bert_max_windows: int = 8
+    legal_bert_window_aggregation: str = "mean"
+    legal_bert_tail_windows: int = 2
+    legal_bert_batching_enabled: bool = True
+    legal_bert_max_batch_size: int = 16
+    legal_bert_max_wait_ms: float = 5.0
+
+    prediction_cache_enabled: bool = True
+    prediction_cache_max_entries: int = 4096
+    prediction_cache_path: str = ""
+    prediction_cache_fingerprint_check_seconds: float = 30.0
 
     faiss_indexes_base_path: str = os.getenv("FAISS_INDEXES_PATH", "./faiss_indexes")
+    faiss_load_mode: str = "memory"
+    faiss_parallel_load: bool = True
+    faiss_lazy_load: bool = False
+    chunk_store_enabled: bool = True
+    faiss_index_types: Dict[str, str] = {}
+    faiss_nprobe: int = 16
+    faiss_ef_search: int = 64
+    faiss_search_params: Dict[str, Dict[str, int]] = {}
+    faiss_rerank_factor: int = 4
+    faiss_unified_index: bool = False
+    faiss_unified_overfetch: int = 4
+    faiss_reload_watch_seconds: float = 0.0
+    faiss_reload_probe_queries: List[str] = [
+        "Section 420 IPC cheating and dishonestly inducing delivery of property",
+        "Article 21 right to life and personal liberty",
+        "bail in a non-bailable offence"
+    ]
 
     constitution_index_path: str = f"{faiss_indexes_base_path}/constitution_bgeLarge.index"
     constitution_chunks_path: str = f"{faiss_indexes_base_path}/constitution_chunks.json"
@@ -34,10 +84,37 @@ class Settings(BaseSettings):
     case_law_index_path: str = f"{faiss_indexes_base_path}/case_faiss.index"
     case_law_chunks_path: str = f"{faiss_indexes_base_path}/case_chunks.pkl"
 
+    retrieval_backend: str = "local"
+    retrieval_shard_urls: List[str] = []
+    retrieval_shard_domains: List[str] = []
+    retrieval_shard_timeout_seconds: float = 10.0
+    retrieval_shard_status_seconds: float = 5.0
+
     sentence_transformer_model: str = "BAAI/bge-large-en-v1.5"
+    sentence_transformer_backend: str = "torch"
+    sentence_transformer_onnx_intra_op_threads: int = 0
+    query_embedding_cache_size: int = 1024
+    retrieval_batching_enabled: bool = True
+    retrieval_max_batch_size: int = 32
+    retrieval_max_wait_ms: float = 3.0
+    long_query_mode: bool = False
+    long_query_passage_words: int = 200
+    long_query_overlap_words: int = 40
+    long_query_max_passages: int = 8
+    long_query_fusion: str = "max"
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_max_entries: int = 8192
+    retrieval_cache_ttl_seconds: float = 3600.0
+    semantic_cache_enabled: bool = False
+    semantic_cache_mode: str = "return"
+    semantic_cache_threshold: float = 0.97
+    semantic_cache_max_entries: int = 1024
+    semantic_cache_ttl_seconds: float = 86400.0
 
     top_k_results: int = 5
     max_unique_chunks: int = 10
+    retrieval_fusion: str = "rrf"
+    retrieval_rrf_k: int = 60
     confidence_threshold: float = 0.6
 
     class Config:
@@ -1,9 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Literal, Optional, Union
 
 class CaseAnalysisRequest(BaseModel):
     caseText: str = Field(..., description="The legal case text to analyze", min_length=10)
-    useQueryGeneration: bool = Field(default=True, description="Whether to use Gemini for query generation in RAG")
+    useQueryGeneration: Union[bool, Literal["gemini", "local", "none"]] = Field(
+        default=True,
+        description='Query generation for RAG: "gemini", "local" (keyword extraction, no LLM call) or "none"; true uses the configured query_generation_mode'
+    )
+    forceFresh: bool = Field(default=False, description="Bypass the semantic near-duplicate cache and run the full analysis")
+    useLLMCache: bool = Field(default=True, description="Serve identical Gemini prompts from the LLM response cache; false always calls Gemini and refreshes the cached response")
 
 class CaseAnalysisResponse(BaseModel):
     initialVerdict: str = Field(..., description="Initial verdict from LegalBERT model")
@@ -23,6 +28,7 @@ class HealthResponse(BaseModel):
 class VerdictPrediction(BaseModel):
     verdict: str = Field(..., description="Predicted verdict (guilty/not guilty)")
     confidence: float = Field(..., description="Confidence score between 0 and 1")
+    probabilities: List[float] = Field(default_factory=list, description="Softmax probability for each class label")
 
 class RAGRetrievalResult(BaseModel):
     query: str = Field(..., description="Query used for retrieval")
@@ -41,3 +47,6 @@ class GeminiEvaluationResponse(BaseModel):
     verdictChanged: str = Field(..., description="Whether verdict was changed")
     explanation: str = Field(..., description="Detailed legal explanation")
     relevantLaws: List[str] = Field(default_factory=list, description="Relevant laws identified")
+
+class ShardTextsRequest(BaseModel):
+    texts: List[str] = Field(..., description="Query or case texts to retrieve for or encode", min_length=1)
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Collects concurrent submissions for up to maxWaitMs and runs them through batchFn together"""
+
+    def __init__(self, name: str, batchFn: Callable[[List[Any]], List[Any]], maxBatchSize: int,
+                 maxWaitMs: float, bucketFn: Optional[Callable[[Any], Hashable]] = None):
+        self.name = name
+        self.batchFn = batchFn
+        self.maxBatchSize = max(1, maxBatchSize)
+        self.maxWaitSeconds = max(0.0, maxWaitMs) / 1000.0
+        self.bucketFn = bucketFn
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._stats = {
+            "batchesRun": 0,
+            "itemsProcessed": 0,
+            "lastBatchSize": 0,
+            "maxBatchSizeSeen": 0,
+            "maxQueueDepthSeen": 0
+        }
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        with self._condition:
+            self._ensureWorker()
+            self._pending.append((item, future))
+            self._stats["maxQueueDepthSeen"] = max(self._stats["maxQueueDepthSeen"], len(self._pending))
+            self._condition.notify()
+        return future
+
+    def _ensureWorker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._worker.start()
+
+    def _collectBatch(self) -> List:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + self.maxWaitSeconds
+            while len(self._pending) < self.maxBatchSize:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return [self._pending.popleft() for _ in range(min(self.maxBatchSize, len(self._pending)))]
+
+    def _groupByBucket(self, batch: List) -> List[List]:
+        if self.bucketFn is None:
+            return [batch]
+        buckets: Dict[Hashable, List] = {}
+        for entry in batch:
+            buckets.setdefault(self.bucketFn(entry[0]), []).append(entry)
+        return list(buckets.values())
+
+    def _run(self):
+        while True:
+            batch = self._collectBatch()
+            with self._condition:
+                self._stats["batchesRun"] += 1
+                self._stats["itemsProcessed"] += len(batch)
+                self._stats["lastBatchSize"] = len(batch)
+                self._stats["maxBatchSizeSeen"] = max(self._stats["maxBatchSizeSeen"], len(batch))
+            for group in self._groupByBucket(batch):
+                self._runGroup(group)
+
+    def _runGroup(self, group: List):
+        items = [item for item, _ in group]
+        try:
+            results = self.batchFn(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name} batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(items)} failed: {str(e)}")
+            for _, future in group:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
+
+    def getStats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self._stats)
+            stats["queueDepth"] = len(self._pending)
+        stats["averageBatchSize"] = stats["itemsProcessed"] / stats["batchesRun"] if stats["batchesRun"] else 0.0
+        stats["maxBatchSize"] = self.maxBatchSize
+        stats["maxWaitMs"] = self.maxWaitSeconds * 1000.0
+        return stats
@@ -0,0 +1,113 @@
+import json
+import mmap
+import os
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_STORE_VERSION = 1
+KIND_TEXT = 0
+KIND_JSON = 1
+TEXT_FIELDS = ("text", "description", "section_desc")
+
+def chunkStorePath(chunkPath: str) -> str:
+    return f"{os.path.splitext(chunkPath)[0]}.chunkstore"
+
+def primaryText(chunk: Any) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, dict):
+        for field in TEXT_FIELDS:
+            if chunk.get(field):
+                return str(chunk[field])
+    return str(chunk)
+
+def sourceSignature(sourcePath: str) -> Dict[str, Any]:
+    stat = os.stat(sourcePath)
+    return {"source": os.path.basename(sourcePath), "sourceSize": stat.st_size, "sourceMtimeNs": stat.st_mtime_ns}
+
+def writeChunkStore(chunks: List[Any], storePath: str, signature: Optional[Dict[str, Any]] = None):
+    import numpy as np
+
+    tmpPath = f"{storePath}.tmp"
+    os.makedirs(tmpPath, exist_ok=True)
+    offsets = np.zeros(len(chunks) + 1, dtype=np.uint64)
+    kinds = np.zeros(len(chunks), dtype=np.uint8)
+    textLengths = np.zeros(len(chunks), dtype=np.uint32)
+
+    with open(os.path.join(tmpPath, "blob.bin"), "wb") as blob:
+        position = 0
+        for i, chunk in enumerate(chunks):
+            if isinstance(chunk, str):
+                payload = chunk.encode("utf-8")
+                kinds[i] = KIND_TEXT
+            else:
+                payload = json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                kinds[i] = KIND_JSON
+            blob.write(payload)
+            position += len(payload)
+            offsets[i + 1] = position
+            textLengths[i] = min(len(primaryText(chunk)), np.iinfo(np.uint32).max)
+
+    np.save(os.path.join(tmpPath, "offsets.npy"), offsets)
+    np.save(os.path.join(tmpPath, "kinds.npy"), kinds)
+    np.save(os.path.join(tmpPath, "textLengths.npy"), textLengths)
+    with open(os.path.join(tmpPath, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": CHUNK_STORE_VERSION, "count": len(chunks), **(signature or {})}, f)
+
+    if os.path.exists(storePath):
+        import shutil
+
+        shutil.rmtree(storePath)
+    os.replace(tmpPath, storePath)
+    logger.info(f"Wrote chunk store with {len(chunks)} chunks to {storePath}")
+
+class ChunkStore(Sequence):
+    """Read-only, memory-mapped chunk list: a UTF-8 blob plus offsets and typed metadata columns"""
+
+    def __init__(self, storePath: str):
+        import numpy as np
+
+        self.path = storePath
+        with open(os.path.join(storePath, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != CHUNK_STORE_VERSION:
+            raise ValueError(f"Unsupported chunk store version in {storePath}: {self.meta.get('version')}")
+        self.offsets = np.load(os.path.join(storePath, "offsets.npy"), mmap_mode="r")
+        self.kinds = np.load(os.path.join(storePath, "kinds.npy"), mmap_mode="r")
+        self.textLengths = np.load(os.path.join(storePath, "textLengths.npy"), mmap_mode="r")
+        self._blobFile = open(os.path.join(storePath, "blob.bin"), "rb")
+        blobSize = os.fstat(self._blobFile.fileno()).st_size
+        self._blob = mmap.mmap(self._blobFile.fileno(), 0, access=mmap.ACCESS_READ) if blobSize else b""
+
+    def isFreshFor(self, sourcePath: str) -> bool:
+        if not os.path.exists(sourcePath):
+            return True
+        signature = sourceSignature(sourcePath)
+        return all(self.meta.get(key) == value for key, value in signature.items())
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._decode(i) for i in range(*idx.indices(len(self)))]
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._decode(idx)
+
+    def _decode(self, idx: int) -> Any:
+        raw = self._blob[int(self.offsets[idx]):int(self.offsets[idx + 1])]
+        if self.kinds[idx] == KIND_TEXT:
+            return raw.decode("utf-8")
+        return json.loads(raw)
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._blobFile.close()
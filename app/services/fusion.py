@@ -0,0 +1,62 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+FUSION_METHODS = ("rrf", "score")
+SCORE_AGGREGATIONS = ("max", "sum")
+
+Ranking = Sequence[Tuple[Hashable, float]]
+
+def reciprocalRankFusion(rankings: Sequence[Ranking], limit: int, k: int = 60) -> List[Tuple[Hashable, float]]:
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, (itemId, _) in enumerate(ranking):
+            fused[itemId] = fused.get(itemId, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+def normalizedScoreFusion(rankings: Sequence[Ranking], limit: int,
+                          higherIsBetter: Optional[Sequence[bool]] = None) -> List[Tuple[Hashable, float]]:
+    """Min-max normalizes each ranking's scores to [0, 1] and sums them per id"""
+    fused: Dict[Hashable, float] = {}
+    for position, ranking in enumerate(rankings):
+        if not ranking:
+            continue
+        scores = [float(score) for _, score in ranking]
+        if higherIsBetter is not None and not higherIsBetter[position]:
+            scores = [-score for score in scores]
+        low, high = min(scores), max(scores)
+        for (itemId, _), score in zip(ranking, scores):
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            fused[itemId] = fused.get(itemId, 0.0) + normalized
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+def fuseRankings(rankings: Sequence[Ranking], limit: int, method: str = "rrf", rrfK: int = 60,
+                 higherIsBetter: Optional[Sequence[bool]] = None) -> List[Tuple[Hashable, float]]:
+    if method == "rrf":
+        return reciprocalRankFusion(rankings, limit, rrfK)
+    if method == "score":
+        return normalizedScoreFusion(rankings, limit, higherIsBetter)
+    raise ValueError(f"Unknown fusion method: {method} (expected one of {', '.join(FUSION_METHODS)})")
+
+def fuseScores(rankings: Sequence[Ranking], limit: int, method: str = "max", higherIsBetter: bool = True) -> List[Tuple[Hashable, float]]:
+    """Combines raw scores for the same id across rankings from one index: best score ("max") or summed score ("sum").
+    For distances, "sum" adds the similarities 1/(1+d) and reports the distance with the same similarity, 1/sum - 1,
+    so an id matched by more rankings still ranks higher"""
+    if method not in SCORE_AGGREGATIONS:
+        raise ValueError(f"Unknown score aggregation: {method} (expected one of {', '.join(SCORE_AGGREGATIONS)})")
+    if higherIsBetter:
+        toFused, fromFused = float, float
+    elif method == "sum":
+        toFused, fromFused = lambda distance: 1.0 / (1.0 + max(0.0, float(distance))), lambda similarity: 1.0 / similarity - 1.0
+    else:
+        toFused, fromFused = lambda distance: -float(distance), lambda score: -score
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for itemId, score in ranking:
+            score = toFused(score)
+            if itemId not in fused:
+                fused[itemId] = score
+            elif method == "max":
+                fused[itemId] = max(fused[itemId], score)
+            else:
+                fused[itemId] += score
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [(itemId, fromFused(score)) for itemId, score in ranked]
@@ -1,32 +1,110 @@
 import re
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 import google.generativeai as genai 
 from app.core.config import settings
+from app.services.llm_cache import LLMResponseCache
+from app.services.prompt_packer import estimateTokens, packReferences, renderReferences, trimMiddle
 
 logger = logging.getLogger(__name__)
 
 class GeminiService:
     def __init__(self):
         self.client = None
+        self._executor = ThreadPoolExecutor(max_workers=settings.gemini_max_concurrency, thread_name_prefix="gemini")
+        self._semaphore = None
+        self._semaphoreLoop = None
+        self._inFlight = 0
+        self._timeouts = 0
+        self.responseCache = None
         self._initialize_client()
+        if settings.llm_cache_enabled:
+            self.responseCache = LLMResponseCache(
+                settings.llm_cache_max_entries,
+                ttlSeconds=settings.llm_cache_ttl_seconds,
+                maxEntryBytes=settings.llm_cache_max_entry_bytes,
+                persistPath=settings.llm_cache_path
+            )
     
     def _initialize_client(self):
         try:
             if settings.gemini_api_key:
                 genai.configure(api_key=settings.gemini_api_key) 
-                self.client = genai.GenerativeModel(model_name=settings.gemini_model) 
+                self.client = genai.GenerativeModel(
+                    model_name=settings.gemini_model,
+                    generation_config=settings.gemini_generation_config or None
+                )
                 logger.info("Gemini client initialized successfully")
             else:
                 logger.warning("Gemini API key not provided")
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {str(e)}")
     
-    def generateSearchQueryFromCase(self, caseFacts: str, geminiModel=None, verbose: bool = False) -> str:
+    def _getSemaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphoreLoop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.gemini_max_concurrency)
+            self._semaphoreLoop = loop
+        return self._semaphore
+    
+    def _lookupResponse(self, prompt: str, kind: str, useCache: bool):
+        if self.responseCache is None:
+            return None, None
+        key = self.responseCache.key(settings.gemini_model, settings.gemini_generation_config, prompt)
+        if not useCache:
+            self.responseCache.bypassed += 1
+            return key, None
+        return key, self.responseCache.lookup(key, kind)
+    
+    def _storeResponse(self, key: Optional[str], kind: str, response):
+        if key is not None:
+            self.responseCache.store(key, kind, response)
+    
+    def responseCacheStatus(self, response, useCache: bool) -> str:
+        if self.responseCache is None:
+            return "disabled"
+        if not useCache:
+            return "bypassed"
+        return getattr(response, "cacheTier", "miss")
+    
+    def generateContent(self, prompt: str, kind: str = "content", useCache: bool = True):
         if not self.client:
             raise ValueError("Gemini client not initialized")
         
-        prompt = f"""
+        key, cached = self._lookupResponse(prompt, kind, useCache)
+        if cached is not None:
+            return cached
+        response = self.client.generate_content(prompt)
+        self._storeResponse(key, kind, response)
+        return response
+    
+    async def generateContentAsync(self, prompt: str, kind: str = "content", useCache: bool = True):
+        if not self.client:
+            raise ValueError("Gemini client not initialized")
+        
+        key, cached = self._lookupResponse(prompt, kind, useCache)
+        if cached is not None:
+            return cached
+        async with self._getSemaphore():
+            self._inFlight += 1
+            try:
+                if settings.gemini_use_native_async and hasattr(self.client, "generate_content_async"):
+                    call = self.client.generate_content_async(prompt)
+                else:
+                    call = asyncio.get_running_loop().run_in_executor(self._executor, self.client.generate_content, prompt)
+                response = await asyncio.wait_for(call, timeout=settings.gemini_timeout_seconds)
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                raise ValueError(f"Gemini call timed out after {settings.gemini_timeout_seconds}s")
+            finally:
+                self._inFlight -= 1
+        self._storeResponse(key, kind, response)
+        return response
+    
+    def _buildSearchQueryPrompt(self, caseFacts: str) -> str:
+        return f"""
 You are a legal assistant for a retrieval system based on Indian criminal law.
 
 Given the case facts below, generate a **concise and focused search query** with **only the most relevant legal keywords**. These should include:
@@ -48,26 +126,51 @@ Case Facts:
 
 Return only the search query, no explanation or prefix:
 """
+    
+    def _parseSearchQuery(self, response, caseFacts: str, verbose: bool) -> str:
+        query = response.text.strip().replace("Search Query:", "").strip('"').replace("\n", "") if response.text else caseFacts[:50]
+        
+        if verbose:
+            logger.info(f"Generated RAG Query: {query}")
+        
+        return query
+    
+    def generateSearchQueryFromCase(self, caseFacts: str, geminiModel=None, verbose: bool = False, useCache: bool = True) -> str:
+        if not self.client:
+            raise ValueError("Gemini client not initialized")
+        
+        try:
+            response = self.generateContent(self._buildSearchQueryPrompt(caseFacts), "searchQuery", useCache)
+            return self._parseSearchQuery(response, caseFacts, verbose)
+        except Exception as e:
+            logger.error(f"Error generating search query: {str(e)}")
+            raise ValueError(f"Search query generation failed: {str(e)}")
+    
+    async def generateSearchQueryFromCaseAsync(self, caseFacts: str, verbose: bool = False, useCache: bool = True) -> str:
+        return (await self.generateSearchQueryWithCacheStatusAsync(caseFacts, verbose, useCache))[0]
+    
+    async def generateSearchQueryWithCacheStatusAsync(self, caseFacts: str, verbose: bool = False,
+                                                     useCache: bool = True) -> Tuple[str, str]:
         try:
-            response = self.client.generate_content(prompt) 
-            query = response.text.strip().replace("Search Query:", "").strip('"').replace("\n", "") if response.text else caseFacts[:50]
-            
-            if verbose:
-                logger.info(f"Generated RAG Query: {query}")
-            
-            return query
+            response = await self.generateContentAsync(self._buildSearchQueryPrompt(caseFacts), "searchQuery", useCache)
+            return self._parseSearchQuery(response, caseFacts, verbose), self.responseCacheStatus(response, useCache)
         except Exception as e:
             logger.error(f"Error generating search query: {str(e)}")
             raise ValueError(f"Search query generation failed: {str(e)}")
     
     def buildGeminiPrompt(self, inputText: str, modelVerdict: str, confidence: float, 
-                         support: Dict[str, List], query: Optional[str] = None) -> str:
+                         support: Dict[str, List], query: Optional[str] = None,
+                         supportScores: Optional[Dict[str, List[float]]] = None) -> str:
+        return self._buildPrompt(inputText, modelVerdict, confidence, support, query, supportScores)[0]
+    
+    def _buildPrompt(self, inputText: str, modelVerdict: str, confidence: float, support: Dict[str, List],
+                     query: Optional[str] = None, supportScores: Optional[Dict[str, List[float]]] = None) -> Tuple[str, Dict[str, Any]]:
         verdictOutcome = "a loss for the person" if modelVerdict.lower() == "guilty" else "in favor of the person"
         
         prompt = f"""You are a judge evaluating a legal dispute under Indian law.
 
 ### Case Facts:
-{inputText}
+{trimMiddle(inputText, settings.gemini_prompt_case_tokens)}
 
 ### Initial Model Verdict:
 {modelVerdict.upper()} (Confidence: {confidence * 100:.2f}%)
@@ -77,29 +180,13 @@ This verdict is interpreted as {verdictOutcome}.
         if query:
             prompt += f"\n### Legal Query Used:\n{query}\n"
         
-        prompt += "\n---\n\n### Legal References Retrieved:\n\n#### Constitution Articles (Top 5):\n"
-        for i, art in enumerate(support.get("constitution", [])):
-            prompt += f"- {i+1}. {str(art)}\n"
-        
-        prompt += "\n#### IPC Sections (Top 5):\n"
-        for i, sec in enumerate(support.get("ipcSections", [])):
-            prompt += f"- {i+1}. {str(sec)}\n"
-        
-        prompt += "\n#### IPC Case Law (Top 5):\n"
-        for i, case in enumerate(support.get("ipcCase", [])):
-            prompt += f"- {i+1}. {str(case)}\n"
-        
-        prompt += "\n#### Statutes (Top 5):\n"
-        for i, stat in enumerate(support.get("statutes", [])):
-            prompt += f"- {i+1}. {str(stat)}\n"
-        
-        prompt += "\n#### QA Texts (Top 5):\n"
-        for i, qa in enumerate(support.get("qaTexts", [])):
-            prompt += f"- {i+1}. {str(qa)}\n"
-        
-        prompt += "\n#### General Case Law (Top 5):\n"
-        for i, gcase in enumerate(support.get("caseLaw", [])):
-            prompt += f"- {i+1}. {str(gcase)}\n"
+        if settings.gemini_prompt_packing:
+            sections, packing = packReferences(support, supportScores, settings.gemini_prompt_reference_tokens, settings.gemini_prompt_chunk_tokens)
+            references = renderReferences(sections)
+        else:
+            references = renderReferences({name: [str(chunk) for chunk in chunks] for name, chunks in support.items()}, includeEmpty=True)
+            packing = {"enabled": False}
+        prompt += f"\n---\n\n### Legal References Retrieved:\n\n{references}"
         
         prompt += f"""
 
@@ -129,7 +216,8 @@ Verdict Changed: Yes or No
 
 Respond in the tone of a formal Indian judge. Your explanation should reflect reasoning, neutrality, and respect for legal procedure.
 """
-        return prompt
+        packing["promptTokensEstimated"] = estimateTokens(prompt)
+        return prompt, packing
     
     def extractFinalVerdict(self, geminiOutput: str) -> tuple[Optional[str], str]:
         verdictMatch = re.search(r"final verdict\s*[:\-]\s*(guilty|not guilty)", geminiOutput, re.IGNORECASE)
@@ -140,6 +228,42 @@ Respond in the tone of a formal Indian judge. Your explanation should reflect re
         
         return finalVerdict, verdictChanged
     
+    def _evaluationLogs(self, inputText: str, modelVerdict: str, confidence: float, support: Dict[str, List],
+                        searchQuery: Optional[str], prompt: str, response, packing: Dict[str, Any],
+                        useCache: bool = True) -> Dict[str, Any]:
+        geminiOutput = response.text if response.text else "No response from Gemini"
+        finalVerdict, verdictChanged = self.extractFinalVerdict(geminiOutput)
+        usage = getattr(response, "usage_metadata", None)
+        
+        return {
+            "inputText": inputText,
+            "modelVerdict": modelVerdict,
+            "confidence": confidence,
+            "support": support,
+            "promptToGemini": prompt,
+            "promptTokens": getattr(usage, "prompt_token_count", None) or packing["promptTokensEstimated"],
+            "promptPacking": packing,
+            "geminiOutput": geminiOutput,
+            "finalVerdictByGemini": finalVerdict,
+            "verdictChanged": verdictChanged,
+            "ragSearchQuery": searchQuery,
+            "llmCache": {"judge": self.responseCacheStatus(response, useCache)}
+        }
+    
+    def buildEvaluationErrorLogs(self, error: Exception, inputText: str, modelVerdict: str, confidence: float) -> Dict[str, Any]:
+        return {
+            "error": str(error),
+            "inputText": inputText,
+            "modelVerdict": modelVerdict,
+            "confidence": confidence,
+            "ragSearchQuery": None,
+            "support": None,
+            "promptToGemini": None,
+            "geminiOutput": None,
+            "finalVerdictByGemini": None,
+            "verdictChanged": None
+        }
+    
     def evaluateCaseWithGemini(self, inputText: str, modelVerdict: str, confidence: float, 
                               retrieveFn, geminiQueryModel=None):
         try:
@@ -149,39 +273,54 @@ Respond in the tone of a formal Indian judge. Your explanation should reflect re
                 support, _ = retrieveFn.retrieveSupportChunksParallel(inputText)
                 searchQuery = inputText
 
-            prompt = self.buildGeminiPrompt(inputText, modelVerdict, confidence, support, searchQuery)
-            response = self.client.generate_content(prompt) 
-            geminiOutput = response.text if response.text else "No response from Gemini"
+            prompt, packing = self._buildPrompt(inputText, modelVerdict, confidence, support, searchQuery)
+            response = self.generateContent(prompt, "judge")
+            return self._evaluationLogs(inputText, modelVerdict, confidence, support, searchQuery, prompt, response, packing)
 
-            finalVerdict, verdictChanged = self.extractFinalVerdict(geminiOutput)
-
-            logs = {
-                "inputText": inputText,
-                "modelVerdict": modelVerdict,
-                "confidence": confidence,
-                "support": support,
-                "promptToGemini": prompt,
-                "geminiOutput": geminiOutput,
-                "finalVerdictByGemini": finalVerdict,
-                "verdictChanged": verdictChanged,
-                "ragSearchQuery": searchQuery
-            }
+        except Exception as e:
+            return self.buildEvaluationErrorLogs(e, inputText, modelVerdict, confidence)
+    
+    async def evaluateCaseWithGeminiAsync(self, inputText: str, modelVerdict: str, confidence: float, 
+                                         retrieveFn, geminiQueryModel=None):
+        try:
+            if geminiQueryModel:
+                try:
+                    geminiQuery = await self.generateSearchQueryFromCaseAsync(inputText)
+                except Exception:
+                    geminiQuery = None
+                support = await asyncio.to_thread(retrieveFn.retrieveDualSupportChunksForQuery, inputText, geminiQuery)
+                searchQuery = geminiQuery
+            else:
+                support, _ = await asyncio.to_thread(retrieveFn.retrieveSupportChunksParallel, inputText)
+                searchQuery = inputText
 
-            return logs
+        except Exception as e:
+            return self.buildEvaluationErrorLogs(e, inputText, modelVerdict, confidence)
 
+        return await self.judgeCaseAsync(inputText, modelVerdict, confidence, support, searchQuery)
+    
+    async def judgeCaseAsync(self, inputText: str, modelVerdict: str, confidence: float, support: Dict[str, List],
+                             searchQuery: Optional[str], supportScores: Optional[Dict[str, List[float]]] = None,
+                             useCache: bool = True) -> Dict[str, Any]:
+        try:
+            prompt, packing = self._buildPrompt(inputText, modelVerdict, confidence, support, searchQuery, supportScores)
+            response = await self.generateContentAsync(prompt, "judge", useCache)
+            return self._evaluationLogs(inputText, modelVerdict, confidence, support, searchQuery, prompt, response, packing, useCache)
         except Exception as e:
-            return {
-                "error": str(e),
-                "inputText": inputText,
-                "modelVerdict": modelVerdict,
-                "confidence": confidence,
-                "ragSearchQuery": None,
-                "support": None,
-                "promptToGemini": None,
-                "geminiOutput": None,
-                "finalVerdictByGemini": None,
-                "verdictChanged": None
-            }
+            return self.buildEvaluationErrorLogs(e, inputText, modelVerdict, confidence)
+    
+    def getConcurrencyStats(self) -> Dict[str, Any]:
+        return {
+            "maxConcurrency": settings.gemini_max_concurrency,
+            "inFlight": self._inFlight,
+            "timeouts": self._timeouts,
+            "timeoutSeconds": settings.gemini_timeout_seconds
+        }
+    
+    def getResponseCacheStats(self) -> Dict[str, Any]:
+        if self.responseCache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.responseCache.getStats()}
     
     def is_configured(self) -> bool:
         return self.client is not None
@@ -0,0 +1,135 @@
+import math
+import os
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf-flat", "ivf-pq", "sq8", "pq")
+COMPRESSED_INDEX_TYPES = ("ivf-pq", "sq8", "pq")
+
+def annIndexPath(indexPath: str, indexType: str) -> str:
+    return f"{os.path.splitext(indexPath)[0]}.{indexType}.index"
+
+def vectorsPath(indexPath: str) -> str:
+    return f"{os.path.splitext(indexPath)[0]}.vectors.npy"
+
+def reconstructVectors(index):
+    import faiss
+    import numpy as np
+
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.make_direct_map()
+    vectors = base.reconstruct_n(0, base.ntotal)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+def loadStoredVectors(indexPath: str, mmap: bool = False):
+    import faiss
+    import numpy as np
+
+    path = vectorsPath(indexPath)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r" if mmap else None)
+    logger.info(f"No stored vectors at {path}, reconstructing from {indexPath}")
+    return reconstructVectors(faiss.read_index(indexPath))
+
+def _ivfListCount(count: int, requested: Optional[int]) -> int:
+    if requested:
+        return requested
+    return max(1, min(int(4 * math.sqrt(count)), count // 39))
+
+def _pqSubquantizers(dim: int, requested: Optional[int]) -> int:
+    m = requested or max(1, dim // 16)
+    while dim % m:
+        m -= 1
+    return m
+
+def buildIndex(vectors, indexType: str, metric: Optional[int] = None, params: Optional[Dict[str, Any]] = None, addVectors: bool = True):
+    import faiss
+    import numpy as np
+
+    params = params or {}
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dim = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT if metric is None else metric
+
+    if indexType == "flat":
+        index = faiss.IndexFlatIP(dim) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dim)
+    elif indexType == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params.get("hnswM", 32), metric)
+        index.hnsw.efConstruction = params.get("efConstruction", 200)
+    elif indexType == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+        index.train(vectors)
+    elif indexType == "pq":
+        nbits = params.get("pqBits") or max(4, min(8, int(math.log2(max(16, count // 39)))))
+        index = faiss.IndexPQ(dim, _pqSubquantizers(dim, params.get("pqM")), nbits, metric)
+        index.train(vectors)
+    elif indexType in ("ivf-flat", "ivf-pq"):
+        nlist = _ivfListCount(count, params.get("nlist"))
+        quantizer = faiss.IndexFlatIP(dim) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dim)
+        if indexType == "ivf-flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        else:
+            nbits = params.get("pqBits") or max(4, min(8, int(math.log2(max(16, count // 39)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pqSubquantizers(dim, params.get("pqM")), nbits, metric)
+        index.train(vectors)
+    else:
+        raise ValueError(f"Unknown index type: {indexType}")
+
+    if addVectors:
+        index.add(vectors)
+    return index
+
+def applySearchParams(index, nprobe: Optional[int] = None, efSearch: Optional[int] = None):
+    import faiss
+
+    base = faiss.downcast_index(index)
+    if nprobe and isinstance(base, faiss.IndexIVF):
+        base.nprobe = nprobe
+    if efSearch and isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = efSearch
+    return index
+
+def indexMemoryBytes(index) -> int:
+    import faiss
+
+    if isinstance(index, RerankingIndex):
+        index = index.index
+    return int(faiss.serialize_index(index).nbytes)
+
+class RerankingIndex:
+    """Searches compressed codes for k * rerankFactor candidates, then re-scores them exactly against full-precision vectors"""
+
+    def __init__(self, index, vectors, rerankFactor: int = 4):
+        self.index = index
+        self.vectors = vectors
+        self.rerankFactor = max(1, rerankFactor)
+        self.metric_type = index.metric_type
+        self.ntotal = index.ntotal
+        self.d = index.d
+
+    def search(self, queries, k: int):
+        import faiss
+        import numpy as np
+
+        candidateCount = min(self.ntotal, k * self.rerankFactor)
+        _, candidates = self.index.search(queries, candidateCount)
+        distances = np.full((len(queries), k), -np.inf if self.metric_type == faiss.METRIC_INNER_PRODUCT else np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for row, rowCandidates in enumerate(candidates):
+            rowCandidates = np.unique(rowCandidates[rowCandidates >= 0])
+            if not len(rowCandidates):
+                continue
+            exact = np.asarray(self.vectors[rowCandidates], dtype=np.float32)
+            if self.metric_type == faiss.METRIC_INNER_PRODUCT:
+                scores = exact @ queries[row]
+                order = np.argsort(-scores)[:k]
+            else:
+                scores = ((exact - queries[row]) ** 2).sum(axis=1)
+                order = np.argsort(scores)[:k]
+            distances[row, :len(order)] = scores[order]
+            ids[row, :len(order)] = rowCandidates[order]
+        return distances, ids
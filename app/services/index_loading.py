@@ -0,0 +1,71 @@
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+def readFaissIndex(indexPath: str, mode: str = "memory"):
+    import faiss
+
+    if mode == "mmap":
+        mmapFlag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            return faiss.read_index(indexPath, mmapFlag | faiss.IO_FLAG_READ_ONLY)
+        except Exception as e:
+            logger.info(f"Index type of {indexPath} does not support mmap, reading into memory: {str(e)}")
+    return faiss.read_index(indexPath)
+
+def processMemoryMb() -> Dict[str, float]:
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Private_Clean:", "Private_Dirty:"):
+                    memory[parts[0][:-1].lower() + "Mb"] = round(int(parts[1]) / 1024, 1)
+    except OSError:
+        import resource
+
+        memory["maxRssMb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return memory
+
+class LazyDomainIndexes(Mapping):
+    """Read-only domain -> (index, chunks) mapping that loads each domain on first access"""
+
+    def __init__(self, domains: Iterable[str], loader: Callable[[str], Tuple[Any, Any]]):
+        self._domains = list(domains)
+        self._loader = loader
+        self._loaded: Dict[str, Tuple[Any, Any]] = {}
+        self._locks = {name: threading.Lock() for name in self._domains}
+
+    def __getitem__(self, name: str) -> Tuple[Any, Any]:
+        if name in self._loaded:
+            return self._loaded[name]
+        if name not in self._locks:
+            raise KeyError(name)
+        with self._locks[name]:
+            if name not in self._loaded:
+                self._loaded[name] = self._loader(name)
+        return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._locks
+
+    def __iter__(self):
+        return iter(self._domains)
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def loadedDomains(self):
+        return list(self._loaded.keys())
+
+class IndexGeneration:
+    """One loaded version of the domain indexes and chunks; requests pin a generation so a hot reload never mixes versions"""
+
+    def __init__(self, indexes: Mapping, unifiedIndex: Any, version: str, loadStats: Dict[str, Any]):
+        self.indexes = indexes
+        self.unifiedIndex = unifiedIndex
+        self.version = version
+        self.loadStats = loadStats
@@ -0,0 +1,202 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from app.services.chunk_store import primaryText
+
+logger = logging.getLogger(__name__)
+
+LEXICON_DOMAINS = ("ipcSections", "constitution")
+LEXICON_FIELDS = ("section_title", "article_title", "title", "heading")
+SEED_CONCEPTS = (
+    "murder", "culpable homicide", "attempt to murder", "common intention", "criminal conspiracy", "abetment",
+    "right of private defence", "grievous hurt", "hurt", "wrongful confinement", "kidnapping", "abduction", "rape",
+    "sexual assault", "dowry death", "cruelty", "theft", "stolen property", "possession", "robbery", "dacoity", "extortion", "cheating",
+    "criminal breach of trust", "dishonest misappropriation", "forgery", "defamation", "criminal intimidation",
+    "breach of contract", "bribe", "corruption", "public servant", "mens rea", "absence of intent", "lack of evidence",
+    "circumstantial evidence", "chain of circumstances", "last seen", "dying declaration", "confession",
+    "recovery", "hostile witness", "eye witness", "benefit of doubt", "delay in fir", "bail", "anticipatory bail",
+    "personal liberty", "right to life", "equality before law", "fair trial", "self incrimination", "double jeopardy"
+)
+STOPWORDS = frozenset(
+    "a an the of and or for to in on by with from as at be is are was were any other such which who whom "
+    "punishment punishable whoever when where certain under act section article".split()
+)
+TITLE_SPLIT = re.compile(r"\s*(?:[,;:()]|\band\b|\bor\b|\bpunishment for\b|\bpunishment of\b)\s*", re.IGNORECASE)
+TITLE_PREFIX = re.compile(r"^(?:article|section)\s+\d+[a-z]*\s*[:.\-]\s*([^.\n]{3,80})", re.IGNORECASE)
+TOKEN = re.compile(r"[a-z0-9]+")
+
+ACT_NAMES = r"(IPC|I\.\s?P\.\s?C\.?|Indian Penal Code|CrPC|Cr\.\s?P\.\s?C\.?|Code of Criminal Procedure)"
+SECTION_LIST = re.compile(
+    r"\b(?:sections?|secs?\.|u/s\.?|s\.)\s*((?:\d{1,3}[A-Z]{0,2}(?:\(\d+\))?(?:\s*(?:,|/|&|and|r/w|read with)\s*)?)+)"
+    rf"(?:\s*(?:of\s+)?(?:the\s+)?{ACT_NAMES})?",
+    re.IGNORECASE
+)
+SHORT_CITATION = re.compile(rf"\b{ACT_NAMES}\s*(?:sections?\s*|s\.\s*)?(\d{{1,3}}[A-Z]{{0,2}})\b", re.IGNORECASE)
+ARTICLE_LIST = re.compile(r"\bart(?:icle)?s?\.?\s*(\d{1,3}[A-Z]?(?:\s*(?:,|&|and)\s*\d{1,3}[A-Z]?)*)", re.IGNORECASE)
+ACT_TITLE = re.compile(r"\b((?:[A-Z][a-z]+)(?:\s+(?:of|and|[A-Z][a-z]+)){0,6}\s+Act)\b")
+NUMBER = re.compile(r"\d{1,3}[A-Z]{0,2}", re.IGNORECASE)
+
+def stemToken(token: str) -> str:
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [stemToken(token) for token in TOKEN.findall(text.lower())]
+
+def canonicalAct(name: Optional[str]) -> str:
+    return "CrPC" if name and ("cr" in name.lower().replace(" ", "")[:3] or "procedure" in name.lower()) else "IPC"
+
+def extractCitations(text: str) -> List[str]:
+    """IPC/CrPC sections, constitution articles and named Acts, in order of first appearance"""
+    found: Dict[str, int] = {}
+    for match in SECTION_LIST.finditer(text):
+        act = canonicalAct(match.group(2))
+        for number in NUMBER.findall(match.group(1)):
+            found.setdefault(f"{act} {number.upper()}", match.start())
+    for match in SHORT_CITATION.finditer(text):
+        found.setdefault(f"{canonicalAct(match.group(1))} {match.group(2).upper()}", match.start())
+    for match in ARTICLE_LIST.finditer(text):
+        for number in NUMBER.findall(match.group(1)):
+            found.setdefault(f"Article {number.upper()}", match.start())
+    for match in ACT_TITLE.finditer(text):
+        name = re.sub(r"^(?:The|This|That)\s+", "", match.group(1))
+        if len(name.split()) > 1:
+            found.setdefault(name, match.start())
+    return sorted(found, key=found.get)
+
+def lexiconPhrases(title: str) -> List[str]:
+    phrases = []
+    for part in TITLE_SPLIT.split(title.lower()):
+        words = [word for word in TOKEN.findall(part)]
+        while words and words[0] in STOPWORDS:
+            words.pop(0)
+        while words and words[-1] in STOPWORDS:
+            words.pop()
+        if 1 <= len(words) <= 5 and not all(word.isdigit() for word in words) and (len(words) > 1 or len(words[0]) > 4):
+            phrases.append(" ".join(words))
+    return phrases
+
+def chunkTitle(chunk: Any) -> Optional[str]:
+    if isinstance(chunk, dict):
+        return next((str(chunk[field]) for field in LEXICON_FIELDS if chunk.get(field)), None)
+    match = TITLE_PREFIX.match(str(chunk))
+    return match.group(1) if match else None
+
+class PhraseMatcher:
+    """Word-level Aho-Corasick automaton: counts every lexicon phrase in a token sequence in a single pass"""
+
+    def __init__(self, phrases: Iterable[Tuple[Tuple[str, ...], str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+        for tokens, display in phrases:
+            node = 0
+            for token in tokens:
+                if token not in self.goto[node]:
+                    self.goto[node][token] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = self.goto[node][token]
+            self.output[node].append(display)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and token not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(token, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def count(self, tokens: Sequence[str]) -> Counter:
+        counts: Counter = Counter()
+        node = 0
+        for token in tokens:
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            for display in self.output[node]:
+                counts[display] += 1
+        return counts
+
+class LocalQueryGenerator:
+    """Builds a Gemini-style keyword query without an LLM call: regex citations first, then lexicon concepts ranked by TF-IDF.
+    The lexicon and document frequencies come from the served IPC and constitution chunks and are rebuilt on index reload"""
+
+    def __init__(self, ragService, maxTerms: int = 12, maxIdfDocs: int = 5000):
+        self.ragService = ragService
+        self.maxTerms = maxTerms
+        self.maxIdfDocs = maxIdfDocs
+        self.matcher: Optional[PhraseMatcher] = None
+        self.idf: Dict[str, float] = {}
+        self.builtVersion: Optional[str] = None
+        self._buildLock = threading.Lock()
+        self._stats = {"queries": 0, "totalMs": 0.0, "lexiconSize": 0, "idfDocuments": 0, "buildSeconds": 0.0}
+
+    def needsBuild(self) -> bool:
+        return self.matcher is None or self.builtVersion != self.ragService.indexVersion
+
+    def build(self):
+        with self._buildLock:
+            if not self.needsBuild():
+                return
+            start = time.perf_counter()
+            version = self.ragService.indexVersion
+            indexes = self.ragService.generation.indexes if hasattr(self.ragService.generation, "indexes") else {}
+            lexicon = {tuple(tokenize(concept)): concept for concept in SEED_CONCEPTS}
+            for name in LEXICON_DOMAINS:
+                if name in indexes:
+                    for chunk in indexes[name][1]:
+                        title = chunkTitle(chunk)
+                        for phrase in lexiconPhrases(title) if title else []:
+                            lexicon.setdefault(tuple(tokenize(phrase)), phrase)
+            matcher = PhraseMatcher(lexicon.items())
+
+            documentFrequency: Counter = Counter()
+            documents = 0
+            for name in indexes:
+                chunks = indexes[name][1]
+                for position in range(min(len(chunks), self.maxIdfDocs)):
+                    documentFrequency.update(matcher.count(tokenize(primaryText(chunks[position]))).keys())
+                    documents += 1
+            self.idf = {phrase: math.log((documents + 1) / (documentFrequency[phrase] + 1)) + 1.0 for phrase in lexicon.values()}
+            self.matcher = matcher
+            self.builtVersion = version
+            self._stats.update({
+                "lexiconSize": len(lexicon),
+                "idfDocuments": documents,
+                "buildSeconds": round(time.perf_counter() - start, 3)
+            })
+            logger.info(f"Local query lexicon: {len(lexicon)} phrases, IDF over {documents} chunks in {self._stats['buildSeconds']}s")
+
+    def generate(self, caseText: str) -> str:
+        if self.needsBuild():
+            self.build()
+        start = time.perf_counter()
+        terms = extractCitations(caseText)[:max(1, self.maxTerms * 2 // 3)]
+        counts = self.matcher.count(tokenize(caseText))
+        ranked = sorted(counts, key=lambda phrase: (-counts[phrase] * self.idf.get(phrase, 1.0), -len(phrase)))
+        concepts: List[str] = []
+        for phrase in ranked:
+            if not any(phrase in chosen for chosen in concepts):
+                concepts.append(phrase)
+        query = ", ".join((terms + concepts)[:self.maxTerms])
+        self._stats["queries"] += 1
+        self._stats["totalMs"] += (time.perf_counter() - start) * 1000
+        return query
+
+    def getStats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["averageMs"] = stats["totalMs"] / stats["queries"] if stats["queries"] else 0.0
+        stats["indexVersion"] = self.builtVersion
+        return stats
@@ -1,4 +1,10 @@
 from app.core.config import settings
+from app.models.schemas import VerdictPrediction
+from app.services.batching import MicroBatcher
+from app.services.prediction_cache import PredictionCache
+from app.services.onnx_runtime import ONNX_BACKENDS, createSession, exportToOnnx, isCacheFresh, onnxCacheDir, quantizeToInt8, sessionInputs
+from typing import Any, Dict, List, Optional
+import asyncio
 import logging
 import os
 import zipfile
@@ -7,11 +13,30 @@ import hashlib
 logger = logging.getLogger(__name__)
 
 class LegalBertService:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
         self.device = "cpu"
+        self.backend = backend or settings.legal_bert_backend
         self.tokenizer = None
         self.model = None
+        self.session = None
+        self.batcher = None
+        self.cache = None
         self._load_model()
+        if settings.prediction_cache_enabled and self.is_model_loaded():
+            self.cache = PredictionCache(
+                self._modelFingerprint,
+                maxEntries=settings.prediction_cache_max_entries,
+                persistPath=settings.prediction_cache_path,
+                fingerprintCheckSeconds=settings.prediction_cache_fingerprint_check_seconds
+            )
+        if settings.legal_bert_batching_enabled:
+            self.batcher = MicroBatcher(
+                "legal-bert",
+                self._predictAndStore,
+                maxBatchSize=settings.legal_bert_max_batch_size,
+                maxWaitMs=settings.legal_bert_max_wait_ms,
+                bucketFn=self._lengthBucket
+            )
     
     def _extract_model_from_zip(self, zipPath: str, extractPath: str):
         """Extract LegalBERT model from zip file"""
@@ -51,19 +76,18 @@ class LegalBertService:
             
             if os.path.exists(settings.legal_bert_model_path) and os.path.exists(os.path.join(settings.legal_bert_model_path, "config.json")):
                 try:
-                    import torch
-                    import torch.nn.functional as F
-                    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-                    
-                    self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                    logger.info(f"Loading LegalBERT model from {settings.legal_bert_model_path}")
+                    from transformers import AutoTokenizer
                     
+                    logger.info(f"Loading LegalBERT model from {settings.legal_bert_model_path} with {self.backend} backend")
                     self.tokenizer = AutoTokenizer.from_pretrained(settings.legal_bert_model_path)
-                    self.model = AutoModelForSequenceClassification.from_pretrained(
-                        settings.legal_bert_model_path
-                    ).to(self.device)
                     
-                    logger.info(f"LegalBERT model loaded successfully on {self.device}")
+                    if self.backend in ONNX_BACKENDS:
+                        self.session = self._load_onnx_session(settings.legal_bert_model_path)
+                    if self.session is None:
+                        self.backend = "torch"
+                        self._load_torch_model(settings.legal_bert_model_path)
+                    
+                    logger.info(f"LegalBERT model loaded successfully on {self.device} ({self.backend})")
                     
                 except ImportError:
                     logger.warning("torch/transformers not installed - using placeholder mode")
@@ -76,66 +100,226 @@ class LegalBertService:
         except Exception as e:
             logger.error(f"Failed to initialize LegalBERT service: {str(e)}")
     
-    def predictVerdict(self, inputText: str) -> str:
-        if not self.is_model_loaded():
-            logger.info("Using placeholder verdict prediction")
-            textHash = int(hashlib.md5(inputText.encode()).hexdigest(), 16)
-            return "guilty" if textHash % 2 == 1 else "not guilty"
+    def _load_torch_model(self, modelPath: str):
+        if self.model is not None:
+            return
+        import torch
+        from transformers import AutoModelForSequenceClassification
         
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = AutoModelForSequenceClassification.from_pretrained(modelPath).to(self.device)
+        self.model.eval()
+    
+    def _load_onnx_session(self, modelPath: str):
         try:
-            import torch
-            import torch.nn.functional as F
+            cacheDir = onnxCacheDir(modelPath)
+            fp32Path = os.path.join(cacheDir, "model-fp32.onnx")
+            int8Path = os.path.join(cacheDir, "model-int8.onnx")
+            targetPath = int8Path if self.backend == "onnx-int8" else fp32Path
             
-            inputs = self.tokenizer(
-                inputText, 
-                return_tensors="pt", 
-                truncation=True, 
-                padding=True
-            ).to(self.device)
-            
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
-                probabilities = F.softmax(logits, dim=1)
-                predictedLabel = torch.argmax(probabilities, dim=1).item()
-            
-            return "guilty" if predictedLabel == 1 else "not guilty"
+            if not isCacheFresh(targetPath, modelPath):
+                if not isCacheFresh(fp32Path, modelPath):
+                    logger.info(f"Exporting LegalBERT to ONNX at {fp32Path}")
+                    self._load_torch_model(modelPath)
+                    dummyInputs = self.tokenizer(["The accused was charged under Section 420."], return_tensors="pt")
+                    exportToOnnx(self.model.cpu(), dummyInputs, fp32Path, ["logits"])
+                if self.backend == "onnx-int8":
+                    quantizeToInt8(fp32Path, int8Path)
             
+            session = createSession(targetPath, settings.legal_bert_onnx_intra_op_threads)
+            self.model = None
+            self.device = "cpu"
+            logger.info(f"Serving LegalBERT through ONNX Runtime from {targetPath}")
+            return session
+        except ImportError:
+            logger.warning("onnx/onnxruntime not installed - falling back to torch backend")
         except Exception as e:
-            logger.error(f"Error predicting verdict: {str(e)}")
-            return "not guilty"
+            logger.error(f"Failed to prepare ONNX backend, falling back to torch: {str(e)}")
+        return None
     
-    def getConfidence(self, inputText: str) -> float:
+    def _placeholderPrediction(self, inputText: str) -> VerdictPrediction:
+        textHash = int(hashlib.md5(inputText.encode()).hexdigest(), 16)
+        verdict = "guilty" if textHash % 2 == 1 else "not guilty"
+        confidence = 0.5 + (textHash % 100) / 200.0
+        probabilities = [1.0 - confidence, confidence] if verdict == "guilty" else [confidence, 1.0 - confidence]
+        return VerdictPrediction(verdict=verdict, confidence=confidence, probabilities=probabilities)
+    
+    def _lengthBucket(self, inputText: str) -> int:
+        estimatedTokens = len(inputText.split()) * 4 // 3
+        for bucket in (64, 128, 256):
+            if estimatedTokens <= bucket:
+                return bucket
+        return 512
+    
+    def _selectWindows(self, sampleMapping: List[int]) -> List[int]:
+        windowsBySample: Dict[int, List[int]] = {}
+        for windowIdx, sampleIdx in enumerate(sampleMapping):
+            windowsBySample.setdefault(sampleIdx, []).append(windowIdx)
+        
+        maxWindows = max(1, settings.legal_bert_max_windows)
+        selected = []
+        for sampleIdx in sorted(windowsBySample):
+            windows = windowsBySample[sampleIdx]
+            if len(windows) > maxWindows:
+                step = (len(windows) - 1) / max(1, maxWindows - 1)
+                windows = [windows[round(i * step)] for i in range(maxWindows)] if maxWindows > 1 else windows[-1:]
+            selected.extend(windows)
+        return selected
+    
+    def _tokenize(self, inputTexts: List[str]):
+        if not settings.legal_bert_long_document_mode:
+            encoded = self.tokenizer(inputTexts, return_tensors="np", truncation=True, padding=True)
+            return dict(encoded), list(range(len(inputTexts)))
+        
+        maxLength = min(self.tokenizer.model_max_length, 512)
+        encoded = dict(self.tokenizer(
+            inputTexts,
+            return_tensors="np",
+            truncation=True,
+            padding=True,
+            max_length=maxLength,
+            stride=settings.legal_bert_window_overlap,
+            return_overflowing_tokens=True
+        ))
+        sampleMapping = encoded.pop("overflow_to_sample_mapping").tolist()
+        selected = self._selectWindows(sampleMapping)
+        encoded = {name: values[selected] for name, values in encoded.items()}
+        usedColumns = int(encoded["attention_mask"].sum(axis=1).max())
+        encoded = {name: values[:, :usedColumns] for name, values in encoded.items()}
+        return encoded, [sampleMapping[i] for i in selected]
+    
+    def _aggregateWindows(self, windowLogits, windowSamples: List[int], sampleCount: int):
+        import numpy as np
+        
+        if len(windowSamples) == sampleCount:
+            return windowLogits
+        
+        strategy = settings.legal_bert_window_aggregation
+        aggregated = []
+        samples = np.asarray(windowSamples)
+        for sampleIdx in range(sampleCount):
+            logits = windowLogits[samples == sampleIdx]
+            if strategy == "max":
+                aggregated.append(logits.max(axis=0))
+            elif strategy == "last":
+                aggregated.append(logits[-max(1, settings.legal_bert_tail_windows):].mean(axis=0))
+            else:
+                aggregated.append(logits.mean(axis=0))
+        return np.stack(aggregated)
+    
+    def _forwardLogits(self, encoded: Dict[str, Any]):
+        if self.session is not None:
+            return self.session.run(["logits"], sessionInputs(self.session, encoded))[0]
+        
+        import torch
+        
+        inputs = {name: torch.from_numpy(values).to(self.device) for name, values in encoded.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits.float().cpu().numpy()
+    
+    def _modelFingerprint(self) -> str:
+        """Model-file digest and inference-settings digest joined by ":"; the prediction cache purges rows by the first part"""
+        filesDigest = hashlib.sha256()
+        modelPath = settings.legal_bert_model_path
+        if os.path.isdir(modelPath):
+            for name in sorted(os.listdir(modelPath)):
+                stat = os.stat(os.path.join(modelPath, name))
+                filesDigest.update(f"|{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        settingsDigest = hashlib.sha256(
+            f"{self.backend}|{settings.legal_bert_long_document_mode}|{settings.legal_bert_window_overlap}|"
+            f"{settings.legal_bert_max_windows}|{settings.legal_bert_window_aggregation}|"
+            f"{settings.legal_bert_tail_windows}".encode()
+        )
+        return f"{filesDigest.hexdigest()[:32]}:{settingsDigest.hexdigest()[:32]}"
+    
+    def _predictAndStore(self, inputTexts: List[str]) -> List[VerdictPrediction]:
+        predictions = self._runModel(inputTexts)
+        if self.cache is not None:
+            for text, prediction in zip(inputTexts, predictions):
+                if prediction.probabilities:
+                    self.cache.store(text, prediction)
+        return predictions
+    
+    def predictBatch(self, inputTexts: List[str]) -> List[VerdictPrediction]:
+        if self.cache is None:
+            return self._predictAndStore(inputTexts)
+        
+        predictions = [self.cache.lookup(text) for text in inputTexts]
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            for i, prediction in zip(missing, self._predictAndStore([inputTexts[i] for i in missing])):
+                predictions[i] = prediction
+        return predictions
+    
+    def _runModel(self, inputTexts: List[str]) -> List[VerdictPrediction]:
         if not self.is_model_loaded():
-            logger.info("Using placeholder confidence score")
-            textHash = int(hashlib.md5(inputText.encode()).hexdigest(), 16)
-            return 0.5 + (textHash % 100) / 200.0
+            logger.info("Using placeholder verdict prediction")
+            return [self._placeholderPrediction(text) for text in inputTexts]
         
         try:
-            import torch
-            import torch.nn.functional as F
-            
-            inputs = self.tokenizer(
-                inputText, 
-                return_tensors="pt", 
-                truncation=True, 
-                padding=True
-            ).to(self.device)
-            
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
-                probabilities = F.softmax(logits, dim=1)
-            
-            return float(torch.max(probabilities).item())
-            
+            return self._inferBatch(inputTexts)
         except Exception as e:
-            logger.error(f"Error getting confidence: {str(e)}")
-            return 0.5
+            if len(inputTexts) > 1:
+                logger.error(f"Error predicting a batch of {len(inputTexts)} verdicts: {str(e)} - retrying one at a time")
+                return [self._runModel([text])[0] for text in inputTexts]
+            logger.error(f"Error predicting verdict: {str(e)}")
+            return [VerdictPrediction(verdict="not guilty", confidence=0.5, probabilities=[])]
+    
+    def _inferBatch(self, inputTexts: List[str]) -> List[VerdictPrediction]:
+        import numpy as np
+        
+        encoded, windowSamples = self._tokenize(inputTexts)
+        logits = self._aggregateWindows(self._forwardLogits(encoded), windowSamples, len(inputTexts))
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities = shifted / shifted.sum(axis=1, keepdims=True)
+        
+        predictions = []
+        for row in probabilities.tolist():
+            predictedLabel = max(range(len(row)), key=row.__getitem__)
+            predictions.append(VerdictPrediction(
+                verdict="guilty" if predictedLabel == 1 else "not guilty",
+                confidence=float(row[predictedLabel]),
+                probabilities=row
+            ))
+        return predictions
+    
+    def predict(self, inputText: str) -> VerdictPrediction:
+        return self.predictBatch([inputText])[0]
+    
+    async def predictAsync(self, inputText: str) -> VerdictPrediction:
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.lookup, inputText)
+            if cached is not None:
+                return cached
+        if self.batcher is None:
+            predictions = await asyncio.to_thread(self._predictAndStore, [inputText])
+            return predictions[0]
+        return await asyncio.wrap_future(self.batcher.submit(inputText))
+    
+    def predictVerdict(self, inputText: str) -> str:
+        return self.predict(inputText).verdict
+    
+    def getConfidence(self, inputText: str) -> float:
+        return self.predict(inputText).confidence
     
     def is_model_loaded(self) -> bool:
-        return self.model is not None and self.tokenizer is not None
+        return self.tokenizer is not None and (self.model is not None or self.session is not None)
     
     def get_device(self) -> str:
         return str(self.device)
     
+    def get_backend(self) -> str:
+        return self.backend
+    
+    def getCacheStats(self) -> Dict[str, Any]:
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.getStats()}
+    
+    def getBatchingStats(self) -> Dict[str, Any]:
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.getStats()}
+    
     def is_healthy(self) -> bool:
         return True
@@ -0,0 +1,93 @@
+import hashlib
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+import logging
+
+from app.services.lru_cache import LRUCache
+from app.services.sqlite_cache import SqliteCacheStore
+from app.services.text_utils import normalizeText
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = ("prompt_token_count", "candidates_token_count", "total_token_count")
+
+class CachedResponse:
+    """Stands in for a Gemini response: exposes `text` and `usage_metadata` like the SDK object, plus the tier it came from"""
+
+    def __init__(self, payload: Dict[str, Any], cacheTier: str):
+        self.text = payload["text"]
+        self.usage_metadata = SimpleNamespace(**payload["usage"]) if payload.get("usage") else None
+        self.cacheTier = cacheTier
+
+class LLMResponseCache:
+    """Memory LRU in front of an optional SQLite tier, keyed by (model, generation config, whitespace-normalized prompt)"""
+
+    def __init__(self, maxEntries: int, ttlSeconds: float = 0.0, maxEntryBytes: int = 0, persistPath: str = ""):
+        self.ttlSeconds = max(0.0, ttlSeconds)
+        self.maxEntryBytes = maxEntryBytes
+        self.memory = LRUCache(maxEntries, self.ttlSeconds)
+        self.disk = None
+        self.diskHits = 0
+        self.stores = 0
+        self.oversized = 0
+        self.bypassed = 0
+        if persistPath:
+            try:
+                self.disk = SqliteCacheStore(persistPath, "llm_responses")
+                if self.ttlSeconds:
+                    self.disk.purgeOlderThan(self.ttlSeconds)
+            except Exception as e:
+                logger.error(f"Failed to open LLM response cache at {persistPath}: {str(e)}")
+
+    def key(self, model: str, generationConfig: Optional[Dict[str, Any]], prompt: str) -> str:
+        material = json.dumps({"model": model, "config": generationConfig or {}, "prompt": normalizeText(prompt)}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str, kind: str) -> Optional[CachedResponse]:
+        payload = self.memory.get((kind, key))
+        if payload is not None:
+            return CachedResponse(payload, "memory")
+        if self.disk is None:
+            return None
+        stored = self.disk.get(key, kind, self.ttlSeconds)
+        if stored is None:
+            return None
+        payload = json.loads(stored)
+        self.diskHits += 1
+        self.memory.put((kind, key), payload)
+        return CachedResponse(payload, "disk")
+
+    def store(self, key: str, kind: str, response) -> bool:
+        try:
+            text = response.text
+        except Exception:
+            return False
+        if not text:
+            return False
+        if self.maxEntryBytes and len(text.encode("utf-8")) > self.maxEntryBytes:
+            self.oversized += 1
+            return False
+        usage = getattr(response, "usage_metadata", None)
+        payload = {"text": text, "usage": {field: getattr(usage, field) for field in USAGE_FIELDS if getattr(usage, field, None) is not None}}
+        self.memory.put((kind, key), payload)
+        self.stores += 1
+        if self.disk is not None:
+            try:
+                self.disk.put(key, kind, json.dumps(payload))
+            except Exception as e:
+                logger.error(f"Failed to persist LLM response: {str(e)}")
+        return True
+
+    def getStats(self) -> Dict[str, Any]:
+        stats = self.memory.getStats()
+        stats["diskHits"] = self.diskHits
+        stats["misses"] -= self.diskHits
+        lookups = stats["hits"] + self.diskHits + stats["misses"]
+        stats["hitRate"] = (stats["hits"] + self.diskHits) / lookups if lookups else 0.0
+        stats["stores"] = self.stores
+        stats["oversized"] = self.oversized
+        stats["bypassed"] = self.bypassed
+        stats["maxEntryBytes"] = self.maxEntryBytes
+        stats["persistent"] = self.disk is not None
+        return stats
@@ -0,0 +1,70 @@
+import inspect
+import os
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+ONNX_BACKENDS = ("onnx-fp32", "onnx-int8")
+
+def onnxCacheDir(modelPath: str) -> str:
+    return f"{os.path.normpath(modelPath)}_onnx"
+
+def isCacheFresh(artifactPath: str, sourceDir: str) -> bool:
+    if not os.path.exists(artifactPath):
+        return False
+    artifactMtime = os.path.getmtime(artifactPath)
+    for name in os.listdir(sourceDir):
+        sourcePath = os.path.join(sourceDir, name)
+        if os.path.isfile(sourcePath) and os.path.getmtime(sourcePath) > artifactMtime:
+            return False
+    return True
+
+def exportToOnnx(module, dummyInputs: Dict[str, Any], outputPath: str, outputNames: List[str]):
+    import torch
+
+    os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+    forwardParams = list(inspect.signature(module.forward).parameters)
+    inputNames = sorted(dummyInputs.keys(), key=lambda name: forwardParams.index(name) if name in forwardParams else len(forwardParams))
+    dynamicAxes = {name: {0: "batch", 1: "sequence"} for name in inputNames}
+    for name in outputNames:
+        dynamicAxes[name] = {0: "batch"}
+
+    exportOptions = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    module.eval()
+    tmpPath = f"{outputPath}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            ({name: dummyInputs[name] for name in inputNames},),
+            tmpPath,
+            input_names=inputNames,
+            output_names=outputNames,
+            dynamic_axes=dynamicAxes,
+            opset_version=17,
+            **exportOptions
+        )
+    os.replace(tmpPath, outputPath)
+    logger.info(f"Exported ONNX graph to {outputPath}")
+
+def quantizeToInt8(fp32Path: str, int8Path: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmpPath = f"{int8Path}.tmp"
+    quantize_dynamic(fp32Path, tmpPath, weight_type=QuantType.QInt8)
+    os.replace(tmpPath, int8Path)
+    logger.info(f"Quantized {fp32Path} to int8 at {int8Path}")
+
+def createSession(modelPath: str, intraOpThreads: int = 0):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intraOpThreads > 0:
+        options.intra_op_num_threads = intraOpThreads
+    return ort.InferenceSession(modelPath, options, providers=["CPUExecutionProvider"])
+
+def sessionInputs(session, encoded: Dict[str, Any]) -> Dict[str, Any]:
+    import numpy as np
+
+    return {inp.name: np.asarray(encoded[inp.name], dtype=np.int64) for inp in session.get_inputs() if inp.name in encoded}
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_MODES = ("gemini", "local", "none")
+
+def queryGenerationMode(useQueryGeneration: Union[bool, str]) -> str:
+    if useQueryGeneration is True:
+        mode = settings.query_generation_mode
+        if mode not in QUERY_MODES:
+            logger.warning(f"Unknown query generation mode {mode} (expected one of {', '.join(QUERY_MODES)}) - using gemini")
+            return "gemini"
+        return mode
+    return useQueryGeneration or "none"
+
+class PipelineStage:
+    def __init__(self, name: str, fn: Callable[..., Awaitable[Any]], dependsOn: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.dependsOn = list(dependsOn)
+
+class StagePipeline:
+    """Runs async stages as a dependency graph; each stage starts as soon as its dependencies finish"""
+
+    def __init__(self):
+        self.stages: Dict[str, PipelineStage] = {}
+
+    def addStage(self, name: str, fn: Callable[..., Awaitable[Any]], dependsOn: Sequence[str] = ()) -> "StagePipeline":
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self.stages[name] = PipelineStage(name, fn, dependsOn)
+        return self
+
+    def _orderedStages(self) -> List[PipelineStage]:
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline dependency cycle at stage: {name}")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].dependsOn:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        pipelineStart = time.perf_counter()
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def runStage(stage: PipelineStage):
+            try:
+                depResults = [await tasks[dep] for dep in stage.dependsOn]
+            except Exception:
+                timings[stage.name] = {"status": "skipped"}
+                raise
+            start = time.perf_counter()
+            status = "failed"
+            try:
+                result = await stage.fn(*depResults)
+                status = "ok"
+                return result
+            finally:
+                timings[stage.name] = {
+                    "status": status,
+                    "startMs": round((start - pipelineStart) * 1000, 2),
+                    "durationMs": round((time.perf_counter() - start) * 1000, 2)
+                }
+
+        for stage in self._orderedStages():
+            tasks[stage.name] = asyncio.ensure_future(runStage(stage))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        results = dict(zip(tasks.keys(), outcomes))
+        for name, outcome in results.items():
+            if isinstance(outcome, Exception) and timings.get(name, {}).get("status") == "failed":
+                logger.error(f"Pipeline stage {name} failed: {str(outcome)}")
+        timings["total"] = {"durationMs": round((time.perf_counter() - pipelineStart) * 1000, 2)}
+        return results, timings
+
+class CaseAnalysisPipeline:
+    def __init__(self, legalBertService, ragService, geminiService, queryGenerator=None):
+        self.legalBertService = legalBertService
+        self.ragService = ragService
+        self.geminiService = geminiService
+        self.queryGenerator = queryGenerator
+
+    async def run(self, caseText: str, useQueryGeneration: Union[bool, str], indexGeneration: Any = None,
+                  useLLMCache: bool = True) -> Tuple[Any, Dict[str, Any]]:
+        pipeline = StagePipeline()
+        indexGeneration = indexGeneration or self.ragService.generation
+        queryMode = queryGenerationMode(useQueryGeneration)
+        if queryMode == "local" and self.queryGenerator is None:
+            logger.warning("Local query generation requested without a query generator - using the case text only")
+            queryMode = "none"
+        llmCache: Dict[str, str] = {}
+
+        async def legalBert():
+            return await self.legalBertService.predictAsync(caseText)
+
+        async def queryGeneration():
+            if queryMode == "none":
+                return None
+            try:
+                if queryMode == "local":
+                    if self.queryGenerator.needsBuild():
+                        await asyncio.to_thread(self.queryGenerator.build)
+                    return self.queryGenerator.generate(caseText) or None
+                query, llmCache["searchQuery"] = await self.geminiService.generateSearchQueryWithCacheStatusAsync(caseText, useCache=useLLMCache)
+                return query
+            except Exception as e:
+                logger.error(f"{queryMode} query generation failed: {str(e)}")
+                return None
+
+        async def caseRetrieval():
+            return await self.ragService.retrieveHitsAsync(caseText, indexGeneration)
+
+        async def queryRetrieval(generatedQuery: Optional[str]):
+            if not generatedQuery:
+                return None
+            return await self.ragService.retrieveHitsAsync(generatedQuery, indexGeneration)
+
+        async def judge(prediction, generatedQuery: Optional[str], hitsFromCase, hitsFromQuery):
+            if queryMode != "none":
+                hits = self.ragService.fuseHits([hitsFromCase, hitsFromQuery or {}], indexGeneration)
+                searchQuery = generatedQuery or caseText
+            else:
+                hits = self.ragService.fuseHits([hitsFromCase], indexGeneration)
+                searchQuery = caseText
+            evaluation = await self.geminiService.judgeCaseAsync(
+                caseText,
+                prediction.verdict,
+                prediction.confidence,
+                self.ragService.supportFromHits(hits, indexGeneration),
+                searchQuery,
+                {name: [score for _, score in domainHits] for name, domainHits in hits.items()},
+                useCache=useLLMCache
+            )
+            evaluation["supportHits"] = self.ragService.formatHits(hits)
+            evaluation["indexVersion"] = indexGeneration.version
+            failedShards = self.ragService.failedShards(indexGeneration)
+            if failedShards:
+                evaluation["failedShards"] = failedShards
+            evaluation["queryMode"] = queryMode
+            evaluation["llmCache"] = {**llmCache, **evaluation.get("llmCache", {})}
+            return evaluation
+
+        pipeline.addStage("legalBert", legalBert)
+        pipeline.addStage("queryGeneration", queryGeneration)
+        pipeline.addStage("caseRetrieval", caseRetrieval)
+        pipeline.addStage("queryRetrieval", queryRetrieval, dependsOn=["queryGeneration"])
+        pipeline.addStage("judge", judge, dependsOn=["legalBert", "queryGeneration", "caseRetrieval", "queryRetrieval"])
+
+        results, timings = await pipeline.run()
+
+        prediction = results["legalBert"]
+        if isinstance(prediction, Exception):
+            raise prediction
+
+        evaluation = results["judge"]
+        if isinstance(evaluation, Exception):
+            evaluation = self.geminiService.buildEvaluationErrorLogs(evaluation, caseText, prediction.verdict, prediction.confidence)
+        evaluation["stageTimings"] = timings
+        return prediction, evaluation
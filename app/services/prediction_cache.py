@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from app.models.schemas import VerdictPrediction
+from app.services.lru_cache import LRUCache
+from app.services.sqlite_cache import SqliteCacheStore
+from app.services.text_utils import textHash
+
+logger = logging.getLogger(__name__)
+
+def modelFilesPart(fingerprint: str) -> str:
+    return fingerprint.split(":", 1)[0] + ":"
+
+class PredictionCache:
+    """Memory LRU plus an optional SQLite tier shared across workers. Rows are tagged with the full fingerprint, so workers
+    with different backends or long-document settings keep separate entries; only a model-file change purges rows"""
+
+    def __init__(self, fingerprintFn: Callable[[], str], maxEntries: int, persistPath: str = "",
+                 fingerprintCheckSeconds: float = 30.0):
+        self.fingerprintFn = fingerprintFn
+        self.fingerprintCheckSeconds = fingerprintCheckSeconds
+        self.memory = LRUCache(maxEntries)
+        self.disk = None
+        self.diskHits = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self.fingerprint = fingerprintFn()
+        self._lastFingerprintCheck = time.monotonic()
+        if persistPath:
+            try:
+                self.disk = SqliteCacheStore(persistPath, "legal_bert_predictions")
+                self.disk.purgeTagsWithoutPrefix(modelFilesPart(self.fingerprint))
+            except Exception as e:
+                logger.error(f"Failed to open prediction cache at {persistPath}: {str(e)}")
+
+    def _checkFingerprint(self):
+        now = time.monotonic()
+        if now - self._lastFingerprintCheck < self.fingerprintCheckSeconds:
+            return
+        with self._lock:
+            if now - self._lastFingerprintCheck < self.fingerprintCheckSeconds:
+                return
+            self._lastFingerprintCheck = now
+            fingerprint = self.fingerprintFn()
+            if fingerprint == self.fingerprint:
+                return
+            logger.info("LegalBERT model files changed - invalidating prediction cache")
+            self.fingerprint = fingerprint
+            self.invalidations += 1
+            self.memory.clear()
+            if self.disk is not None:
+                self.disk.purgeTagsWithoutPrefix(modelFilesPart(fingerprint))
+
+    def lookup(self, inputText: str) -> Optional[VerdictPrediction]:
+        self._checkFingerprint()
+        key = textHash(inputText)
+        prediction = self.memory.get((self.fingerprint, key))
+        if prediction is not None or self.disk is None:
+            return prediction
+        stored = self.disk.get(key, self.fingerprint)
+        if stored is None:
+            return None
+        prediction = VerdictPrediction.model_validate_json(stored)
+        self.diskHits += 1
+        self.memory.put((self.fingerprint, key), prediction)
+        return prediction
+
+    def store(self, inputText: str, prediction: VerdictPrediction):
+        key = textHash(inputText)
+        self.memory.put((self.fingerprint, key), prediction)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, self.fingerprint, prediction.model_dump_json())
+            except Exception as e:
+                logger.error(f"Failed to persist prediction: {str(e)}")
+
+    def getStats(self) -> Dict[str, Any]:
+        stats = self.memory.getStats()
+        stats["diskHits"] = self.diskHits
+        stats["misses"] -= self.diskHits
+        lookups = stats["hits"] + self.diskHits + stats["misses"]
+        stats["hitRate"] = (stats["hits"] + self.diskHits) / lookups if lookups else 0.0
+        stats["persistent"] = self.disk is not None
+        stats["invalidations"] = self.invalidations
+        stats["fingerprint"] = ":".join(part[:12] for part in self.fingerprint.split(":"))
+        return stats
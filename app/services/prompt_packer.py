@@ -0,0 +1,89 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.chunk_store import TEXT_FIELDS, primaryText
+
+CHARS_PER_TOKEN = 4.0
+LINE_OVERHEAD_TOKENS = 2
+DOMAIN_TITLES = {
+    "constitution": "Constitution Articles",
+    "ipcSections": "IPC Sections",
+    "ipcCase": "IPC Case Law",
+    "statutes": "Statutes",
+    "qaTexts": "QA Texts",
+    "caseLaw": "General Case Law"
+}
+LABEL_FIELDS = ("article", "section", "title", "case_name", "name")
+
+def estimateTokens(text: str) -> int:
+    """Character-based estimate (~4 characters per Gemini token for English text); no network call"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def trimToTokens(text: str, maxTokens: int) -> str:
+    maxChars = int(maxTokens * CHARS_PER_TOKEN)
+    if maxTokens <= 0 or len(text) <= maxChars:
+        return text
+    cut = text.rfind(" ", 0, maxChars)
+    return text[:cut if cut > maxChars // 2 else maxChars].rstrip() + " …"
+
+def trimMiddle(text: str, maxTokens: int) -> str:
+    """Keeps the opening two thirds and closing third of an over-long text, where facts and the relief sought usually sit"""
+    maxChars = int(maxTokens * CHARS_PER_TOKEN)
+    if maxTokens <= 0 or len(text) <= maxChars:
+        return text
+    head = maxChars * 2 // 3
+    return f"{text[:head].rstrip()} [...] {text[len(text) - (maxChars - head):].lstrip()}"
+
+def compactChunk(chunk: Any) -> str:
+    """Salient text of a chunk on one line, prefixed with its article/section label when the text does not already name it"""
+    if isinstance(chunk, dict) and not any(chunk.get(field) for field in TEXT_FIELDS):
+        return "; ".join(f"{key}: {' '.join(str(value).split())}" for key, value in chunk.items() if value not in (None, ""))
+    text = " ".join(primaryText(chunk).split())
+    if isinstance(chunk, dict):
+        label = next((str(chunk[field]) for field in LABEL_FIELDS if chunk.get(field)), None)
+        if label and label not in text[:80]:
+            return f"{label}: {text}"
+    return text
+
+def packReferences(support: Dict[str, List], scores: Optional[Dict[str, List[float]]], budgetTokens: int,
+                   chunkTokens: int) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+    """Greedily fills the token budget with the highest-scoring chunks across all domains, each trimmed to chunkTokens.
+    Without scores, chunks are ranked by reciprocal rank so every domain's best chunks go first"""
+    candidates = []
+    for name, chunks in support.items():
+        domainScores = (scores or {}).get(name) or []
+        for rank, chunk in enumerate(chunks):
+            score = domainScores[rank] if rank < len(domainScores) else 1.0 / (60 + rank + 1)
+            candidates.append((score, rank, name, chunk))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+
+    selected: Dict[str, List[Tuple[int, str]]] = {}
+    usedTokens = 0
+    for _, rank, name, chunk in candidates:
+        text = trimToTokens(compactChunk(chunk), chunkTokens)
+        cost = estimateTokens(text) + LINE_OVERHEAD_TOKENS
+        if budgetTokens > 0 and usedTokens + cost > budgetTokens:
+            continue
+        usedTokens += cost
+        selected.setdefault(name, []).append((rank, text))
+
+    sections = {name: [text for _, text in sorted(selected[name])] for name in support if name in selected}
+    stats = {
+        "enabled": True,
+        "budgetTokens": budgetTokens,
+        "referenceTokens": usedTokens,
+        "chunksAvailable": len(candidates),
+        "chunksIncluded": sum(len(texts) for texts in sections.values()),
+        "perDomain": {name: len(texts) for name, texts in sections.items()}
+    }
+    return sections, stats
+
+def renderReferences(sections: Dict[str, List[str]], includeEmpty: bool = False) -> str:
+    names = list(DOMAIN_TITLES) + [name for name in sections if name not in DOMAIN_TITLES]
+    rendered = []
+    for name in names:
+        texts = sections.get(name, [])
+        if texts or (includeEmpty and name in DOMAIN_TITLES):
+            lines = "".join(f"{i}. {text}\n" for i, text in enumerate(texts, 1))
+            rendered.append(f"#### {DOMAIN_TITLES.get(name, name)}:\n{lines}")
+    return "\n".join(rendered)
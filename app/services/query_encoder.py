@@ -0,0 +1,105 @@
+import json
+import os
+from typing import List, Optional
+import logging
+
+from app.services.onnx_runtime import createSession, exportToOnnx, isCacheFresh, onnxCacheDir, quantizeToInt8, sessionInputs
+
+logger = logging.getLogger(__name__)
+
+def resolveModelDir(modelName: str) -> str:
+    if os.path.isdir(modelName):
+        return modelName
+    from huggingface_hub import snapshot_download
+
+    return snapshot_download(modelName)
+
+def poolingMode(modelDir: str) -> str:
+    """Reads the sentence-transformers pooling config; bge models pool on the CLS token"""
+    configPath = os.path.join(modelDir, "1_Pooling", "config.json")
+    if os.path.exists(configPath):
+        with open(configPath, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("pooling_mode_mean_tokens") and not config.get("pooling_mode_cls_token"):
+            return "mean"
+    return "cls"
+
+def hiddenStateModule(model):
+    import torch
+
+    class HiddenStateModule(torch.nn.Module):
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.encoder(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids).last_hidden_state
+
+    return HiddenStateModule(model)
+
+class OnnxSentenceEncoder:
+    """ONNX Runtime drop-in for SentenceTransformer.encode, producing the same pooled, normalized vectors"""
+
+    def __init__(self, modelName: str, backend: str = "onnx-fp32", intraOpThreads: int = 0, maxLength: Optional[int] = None):
+        from transformers import AutoTokenizer
+
+        self.modelDir = resolveModelDir(modelName)
+        self.backend = backend
+        self.tokenizer = AutoTokenizer.from_pretrained(self.modelDir)
+        self.maxLength = min(maxLength or 512, self.tokenizer.model_max_length)
+        self.pooling = poolingMode(self.modelDir)
+        self.modelPath = self._prepareGraph()
+        self.session = createSession(self.modelPath, intraOpThreads)
+        self.dimension = None
+        logger.info(f"Serving query encoder through ONNX Runtime from {self.modelPath} ({self.pooling} pooling)")
+
+    def _prepareGraph(self) -> str:
+        cacheDir = onnxCacheDir(self.modelDir)
+        fp32Path = os.path.join(cacheDir, "encoder-fp32.onnx")
+        int8Path = os.path.join(cacheDir, "encoder-int8.onnx")
+        targetPath = int8Path if self.backend == "onnx-int8" else fp32Path
+        if isCacheFresh(targetPath, self.modelDir):
+            return targetPath
+
+        if not isCacheFresh(fp32Path, self.modelDir):
+            from transformers import AutoModel
+
+            logger.info(f"Exporting query encoder to ONNX at {fp32Path}")
+            model = AutoModel.from_pretrained(self.modelDir)
+            dummyInputs = self.tokenizer(["Section 420 cheating and dishonestly inducing delivery of property"], return_tensors="pt")
+            exportToOnnx(hiddenStateModule(model.cpu()), dict(dummyInputs), fp32Path, ["last_hidden_state"])
+        if self.backend == "onnx-int8":
+            quantizeToInt8(fp32Path, int8Path)
+        return targetPath
+
+    def _pool(self, hidden, attentionMask):
+        import numpy as np
+
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attentionMask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        import numpy as np
+
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        order = np.argsort([-len(text) for text in texts])
+        pooled = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            batchIdx = order[start:start + batch_size]
+            encoded = self.tokenizer([texts[i] for i in batchIdx], padding=True, truncation=True,
+                                     max_length=self.maxLength, return_tensors="np")
+            hidden = self.session.run(["last_hidden_state"], sessionInputs(self.session, encoded))[0]
+            for i, vector in zip(batchIdx, self._pool(hidden, encoded["attention_mask"])):
+                pooled[i] = vector
+        embeddings = np.stack(pooled).astype(np.float32) if pooled else np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self.dimension is None:
+            self.dimension = int(self.encode(["dimension probe"]).shape[1])
+        return self.dimension
@@ -1,21 +1,103 @@
+import asyncio
+import hashlib
 import json
+import operator
 import os
 import pickle
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from app.core.config import settings
+from app.services.batching import MicroBatcher
+from app.services.chunk_store import ChunkStore, chunkStorePath
+from app.services.fusion import fuseScores
+from app.services.index_builder import COMPRESSED_INDEX_TYPES, RerankingIndex, annIndexPath, applySearchParams, loadStoredVectors, vectorsPath
+from app.services.index_loading import IndexGeneration, LazyDomainIndexes, processMemoryMb, readFaissIndex
+from app.services.lru_cache import LRUCache
+from app.services.onnx_runtime import ONNX_BACKENDS
+from app.services.query_encoder import OnnxSentenceEncoder
+from app.services.retrieval_backend import RetrievalBackend
+from app.services.text_utils import normalizeText, splitPassages
+from app.services.unified_index import UNIFIED_INDEX_FILE, UNIFIED_META_FILE, UnifiedDomainView, UnifiedIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
-class RAGService:
+DOMAIN_FILES = {
+    "constitution": ("constitution_bgeLarge.index", "constitution_chunks.json"),
+    "ipcSections": ("ipc_bgeLarge.index", "ipc_chunks.json"),
+    "ipcCase": ("ipc_case_flat.index", "ipc_case_chunks.json"),
+    "statutes": ("statute_index.faiss", "statute_chunks.pkl"),
+    "qaTexts": ("qa_faiss_index.idx", "qa_text_chunks.json"),
+    "caseLaw": ("case_faiss.index", "case_chunks.pkl")
+}
+
+def servedDomains() -> List[str]:
+    """Domains this process serves; a retrieval shard can be limited to a subset with RETRIEVAL_SHARD_DOMAINS"""
+    return [name for name in DOMAIN_FILES if not settings.retrieval_shard_domains or name in settings.retrieval_shard_domains]
+
+class RAGService(RetrievalBackend):
     def __init__(self):
         self.encoder = None
-        self.preloadedIndexes = {}
+        self._generation = IndexGeneration({}, None, "", {})
+        self._searchExecutor = ThreadPoolExecutor(max_workers=len(DOMAIN_FILES), thread_name_prefix="rag-search")
+        self.embeddingCache = LRUCache(settings.query_embedding_cache_size)
+        self.retrievalCache = None
+        if settings.retrieval_cache_enabled:
+            self.retrievalCache = LRUCache(settings.retrieval_cache_max_entries, settings.retrieval_cache_ttl_seconds)
+        self._reloadLock = threading.Lock()
+        self._reloadStats = {"reloads": 0, "failedReloads": 0, "inProgress": False, "last": None}
+        self._retrievalStats = {"queries": 0, "servedFromCache": 0, "longQueries": 0, "passages": 0}
+        self._encodeStats = {"calls": 0, "textsEncoded": 0, "totalEncodeMs": 0.0}
+        self._encodeStatsLock = threading.Lock()
+        self.retrievalBatcher = None
         self._initialize_encoder()
         self._load_indexes()
+        if settings.retrieval_batching_enabled and self.encoder != "placeholder":
+            self.retrievalBatcher = MicroBatcher(
+                "retrieval",
+                self._retrieveBatchItems,
+                maxBatchSize=settings.retrieval_max_batch_size,
+                maxWaitMs=settings.retrieval_max_wait_ms,
+                bucketFn=operator.itemgetter(1)
+            )
+        if settings.faiss_reload_watch_seconds > 0:
+            threading.Thread(target=self._watchIndexFiles, name="rag-index-watch", daemon=True).start()
+    
+    @property
+    def generation(self) -> IndexGeneration:
+        return self._generation
+    
+    @property
+    def preloadedIndexes(self):
+        return self.generation.indexes
+    
+    @property
+    def unifiedIndex(self):
+        return self.generation.unifiedIndex
+    
+    @property
+    def indexVersion(self) -> str:
+        return self.generation.version
+    
+    @property
+    def loadStats(self) -> Dict[str, Any]:
+        return self.generation.loadStats
     
     def _initialize_encoder(self):
+        if settings.sentence_transformer_backend in ONNX_BACKENDS:
+            try:
+                self.encoder = OnnxSentenceEncoder(
+                    settings.sentence_transformer_model,
+                    backend=settings.sentence_transformer_backend,
+                    intraOpThreads=settings.sentence_transformer_onnx_intra_op_threads
+                )
+                return
+            except ImportError:
+                logger.warning("onnx/onnxruntime not installed - falling back to sentence-transformers")
+            except Exception as e:
+                logger.error(f"Failed to prepare ONNX query encoder, falling back to sentence-transformers: {str(e)}")
         try:
             from sentence_transformers import SentenceTransformer
             logger.info(f"Loading sentence transformer: {settings.sentence_transformer_model}")
@@ -30,23 +112,17 @@ class RAGService:
     
     def loadFaissIndexAndChunks(self, indexPath: str, chunkPath: str) -> Tuple[Any, List]:
         try:
-            if not os.path.exists(indexPath) or not os.path.exists(chunkPath):
+            if not os.path.exists(indexPath) or not self._chunksAvailable(chunkPath):
                 logger.warning(f"Missing files: {indexPath} or {chunkPath}")
                 return None, []
             
             try:
-                import faiss
-                index = faiss.read_index(indexPath)
+                index = readFaissIndex(indexPath, settings.faiss_load_mode)
             except ImportError:
                 logger.warning("faiss-cpu not installed - returning placeholder")
                 return "placeholder_index", []
             
-            if chunkPath.endswith('.pkl'):
-                with open(chunkPath, 'rb') as f:
-                    chunks = pickle.load(f)
-            else:
-                with open(chunkPath, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
+            chunks = self._loadChunks(chunkPath)
             
             logger.info(f"Loaded index from {indexPath} with {len(chunks)} chunks")
             return index, chunks
@@ -54,105 +130,428 @@ class RAGService:
             logger.error(f"Failed to load index {indexPath}: {str(e)}")
             return None, []
     
+    def _chunksAvailable(self, chunkPath: str) -> bool:
+        return os.path.exists(chunkPath) or (settings.chunk_store_enabled and os.path.isdir(chunkStorePath(chunkPath)))
+    
+    def _loadChunks(self, chunkPath: str):
+        storePath = chunkStorePath(chunkPath)
+        if settings.chunk_store_enabled and os.path.isdir(storePath):
+            try:
+                store = ChunkStore(storePath)
+                if store.isFreshFor(chunkPath):
+                    return store
+                logger.warning(f"Chunk store {storePath} is stale relative to {chunkPath} - re-run scripts.convert_chunk_stores")
+                store.close()
+            except Exception as e:
+                logger.error(f"Failed to open chunk store {storePath}: {str(e)}")
+        
+        if chunkPath.endswith('.pkl'):
+            with open(chunkPath, 'rb') as f:
+                return pickle.load(f)
+        with open(chunkPath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _loadDomain(self, name: str, generation: IndexGeneration) -> Tuple[Any, List]:
+        basePath = settings.faiss_indexes_base_path
+        indexFile, chunkFile = DOMAIN_FILES[name]
+        if generation.unifiedIndex is not None and name in generation.unifiedIndex.domainIds:
+            return self._loadUnifiedDomain(name, f"{basePath}/{chunkFile}", generation)
+        indexPath = f"{basePath}/{indexFile}"
+        indexType = settings.faiss_index_types.get(name, "flat")
+        if indexType != "flat":
+            if os.path.exists(annIndexPath(indexPath, indexType)):
+                indexPath = annIndexPath(indexPath, indexType)
+            else:
+                logger.warning(f"{indexType} index for {name} not built yet - using {indexPath} (run scripts.rebuild_index)")
+        
+        start = time.perf_counter()
+        index, chunks = self.loadFaissIndexAndChunks(indexPath, f"{basePath}/{chunkFile}")
+        if index is not None and index != "placeholder_index":
+            searchParams = {"nprobe": settings.faiss_nprobe, "efSearch": settings.faiss_ef_search}
+            searchParams.update(settings.faiss_search_params.get(name, {}))
+            applySearchParams(index, **searchParams)
+            if indexType in COMPRESSED_INDEX_TYPES and settings.faiss_rerank_factor > 1:
+                index = self._withExactRerank(name, index, f"{basePath}/{indexFile}")
+        generation.loadStats["domainLoadSeconds"][name] = round(time.perf_counter() - start, 3)
+        return index, chunks
+    
+    def _loadUnifiedDomain(self, name: str, chunkPath: str, generation: IndexGeneration) -> Tuple[Any, List]:
+        start = time.perf_counter()
+        try:
+            chunks = self._loadChunks(chunkPath)
+        except Exception as e:
+            logger.error(f"Failed to load chunks {chunkPath}: {str(e)}")
+            return None, []
+        unifiedIndex = generation.unifiedIndex
+        if len(chunks) != unifiedIndex.domainCounts[name]:
+            logger.warning(f"{name} has {len(chunks)} chunks but {unifiedIndex.domainCounts[name]} vectors in the unified index")
+        generation.loadStats["domainLoadSeconds"][name] = round(time.perf_counter() - start, 3)
+        return unifiedIndex.domainView(name), chunks
+    
+    def _withExactRerank(self, name: str, index: Any, sourceIndexPath: str) -> Any:
+        storedVectors = vectorsPath(sourceIndexPath)
+        if not os.path.exists(storedVectors):
+            logger.warning(f"No stored vectors at {storedVectors} - {name} serves compressed scores without re-ranking")
+            return index
+        return RerankingIndex(index, loadStoredVectors(sourceIndexPath, mmap=True), settings.faiss_rerank_factor)
+    
     def _load_indexes(self):
+        self._generation = self._loadGeneration()
+    
+    def _loadGeneration(self) -> IndexGeneration:
         basePath = settings.faiss_indexes_base_path
-        self.preloadedIndexes = {
-            "constitution": self.loadFaissIndexAndChunks(f"{basePath}/constitution_bgeLarge.index", f"{basePath}/constitution_chunks.json"),
-            "ipcSections": self.loadFaissIndexAndChunks(f"{basePath}/ipc_bgeLarge.index", f"{basePath}/ipc_chunks.json"),
-            "ipcCase": self.loadFaissIndexAndChunks(f"{basePath}/ipc_case_flat.index", f"{basePath}/ipc_case_chunks.json"),
-            "statutes": self.loadFaissIndexAndChunks(f"{basePath}/statute_index.faiss", f"{basePath}/statute_chunks.pkl"),
-            "qaTexts": self.loadFaissIndexAndChunks(f"{basePath}/qa_faiss_index.idx", f"{basePath}/qa_text_chunks.json"),
-            "caseLaw": self.loadFaissIndexAndChunks(f"{basePath}/case_faiss.index", f"{basePath}/case_chunks.pkl")
-        }
-        
-        self.preloadedIndexes = {k: v for k, v in self.preloadedIndexes.items() if v[0] is not None}
-        logger.info(f"Successfully loaded {len(self.preloadedIndexes)} indexes")
+        domains = servedDomains()
+        start = time.perf_counter()
+        generation = IndexGeneration({}, None, self._computeIndexVersion(), {
+            "mode": settings.faiss_load_mode,
+            "parallel": settings.faiss_parallel_load,
+            "lazy": settings.faiss_lazy_load,
+            "unified": False,
+            "memoryBefore": processMemoryMb(),
+            "domainLoadSeconds": {}
+        })
+        
+        def loadDomain(name: str) -> Tuple[Any, List]:
+            return self._loadDomain(name, generation)
+        
+        if settings.faiss_unified_index:
+            try:
+                generation.unifiedIndex = UnifiedIndex.load(basePath, DOMAIN_FILES, settings.faiss_load_mode, settings.faiss_unified_overfetch)
+            except ImportError:
+                logger.warning("faiss-cpu not installed - unified index disabled")
+            except Exception as e:
+                logger.error(f"Failed to load unified index: {str(e)}")
+            generation.loadStats["unified"] = generation.unifiedIndex is not None
+        
+        if settings.faiss_lazy_load:
+            available = [
+                name for name, (indexFile, chunkFile) in DOMAIN_FILES.items()
+                if name in domains and os.path.exists(f"{basePath}/{indexFile}") and self._chunksAvailable(f"{basePath}/{chunkFile}")
+            ]
+            generation.indexes = LazyDomainIndexes(available, loadDomain)
+            logger.info(f"Registered {len(available)} indexes for lazy loading")
+        else:
+            if settings.faiss_parallel_load:
+                with ThreadPoolExecutor(max_workers=max(1, len(domains))) as executor:
+                    loaded = dict(zip(domains, executor.map(loadDomain, domains)))
+            else:
+                loaded = {name: loadDomain(name) for name in domains}
+            generation.indexes = {k: v for k, v in loaded.items() if v[0] is not None}
+            logger.info(f"Successfully loaded {len(generation.indexes)} indexes")
+        
+        generation.loadStats["indexVersion"] = generation.version
+        generation.loadStats["startupSeconds"] = round(time.perf_counter() - start, 3)
+        generation.loadStats["memoryAfter"] = processMemoryMb()
+        return generation
+    
+    def reloadIndexes(self) -> Dict[str, Any]:
+        """Loads the index files as a new generation while the current one keeps serving, warms it, then swaps it in"""
+        if not self._reloadLock.acquire(blocking=False):
+            raise RuntimeError("Index reload already in progress")
+        self._reloadStats["inProgress"] = True
+        try:
+            start = time.perf_counter()
+            previous = self.generation
+            generation = self._loadGeneration()
+            if len(generation.indexes) == 0 and len(previous.indexes) > 0:
+                raise ValueError(f"No indexes found under {settings.faiss_indexes_base_path} - keeping version {previous.version}")
+            warmupMs = self._warmGeneration(generation)
+            self._generation = generation
+            if self.retrievalCache is not None:
+                self.retrievalCache.clear()
+            result = {
+                "previousVersion": previous.version,
+                "indexVersion": generation.version,
+                "indexCount": len(generation.indexes),
+                "reloadSeconds": round(time.perf_counter() - start, 3),
+                "warmupMs": warmupMs
+            }
+            self._reloadStats["reloads"] += 1
+            self._reloadStats["last"] = result
+            logger.info(f"Swapped index version {previous.version} -> {generation.version} after {result['reloadSeconds']}s")
+            return result
+        except Exception:
+            self._reloadStats["failedReloads"] += 1
+            raise
+        finally:
+            self._reloadStats["inProgress"] = False
+            self._reloadLock.release()
+    
+    def startReload(self) -> bool:
+        if self._reloadLock.locked():
+            return False
+        
+        def run():
+            try:
+                self.reloadIndexes()
+            except Exception as e:
+                logger.error(f"Index reload failed: {str(e)}")
+        
+        threading.Thread(target=run, name="rag-index-reload", daemon=True).start()
+        return True
+    
+    def _warmGeneration(self, generation: IndexGeneration) -> float:
+        start = time.perf_counter()
+        probes = settings.faiss_reload_probe_queries
+        if self.encoder == "placeholder" or not probes:
+            for name in generation.indexes:
+                generation.indexes[name]
+        else:
+            self._retrieveBatch(self.encodeQueries(probes), settings.top_k_results, generation=generation)
+        return round((time.perf_counter() - start) * 1000, 2)
+    
+    def _watchIndexFiles(self):
+        pendingVersion, failedVersion = None, None
+        while True:
+            time.sleep(settings.faiss_reload_watch_seconds)
+            onDisk = self._computeIndexVersion()
+            if onDisk in (self.indexVersion, failedVersion):
+                pendingVersion = None
+                continue
+            if onDisk != pendingVersion:
+                pendingVersion = onDisk
+                continue
+            try:
+                self.reloadIndexes()
+            except Exception as e:
+                failedVersion = onDisk
+                logger.error(f"Index reload after file change failed: {str(e)}")
+    
+    def _indexArtifactPaths(self) -> List[str]:
+        """Every file a generation load may read: base, ANN and unified indexes, stored vectors, chunk files and chunk stores"""
+        basePath = settings.faiss_indexes_base_path
+        paths = [f"{basePath}/{UNIFIED_INDEX_FILE}", f"{basePath}/{UNIFIED_META_FILE}"] if settings.faiss_unified_index else []
+        for name in servedDomains():
+            indexFile, chunkFile = DOMAIN_FILES[name]
+            indexPath, chunkPath = f"{basePath}/{indexFile}", f"{basePath}/{chunkFile}"
+            paths += [indexPath, vectorsPath(indexPath), chunkPath]
+            indexType = settings.faiss_index_types.get(name, "flat")
+            if indexType != "flat":
+                paths.append(annIndexPath(indexPath, indexType))
+            storePath = chunkStorePath(chunkPath)
+            if settings.chunk_store_enabled and os.path.isdir(storePath):
+                paths += sorted(entry.path for entry in os.scandir(storePath) if entry.is_file())
+        return paths
+    
+    def _computeIndexVersion(self) -> str:
+        digest = hashlib.sha256(json.dumps(
+            [settings.faiss_index_types, settings.faiss_unified_index, settings.chunk_store_enabled], sort_keys=True
+        ).encode("utf-8"))
+        for path in self._indexArtifactPaths():
+            if os.path.exists(path):
+                stat = os.stat(path)
+                digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()[:12]
     
     def search(self, index: Any, chunks: List, queryEmbedding, topK: int) -> List[Tuple[float, Any]]:
+        return self.searchBatch(index, chunks, queryEmbedding[0:1], topK)[0]
+    
+    def searchBatch(self, index: Any, chunks: List, queryEmbeddings, topK: int) -> List[List[Tuple[float, Any]]]:
+        return [[(score, chunks[idx]) for idx, score in hits] for hits in self.searchIds(index, len(chunks), queryEmbeddings, topK)]
+    
+    def searchIds(self, index: Any, chunkCount: int, queryEmbeddings, topK: int) -> List[List[Tuple[int, float]]]:
         try:
             if index == "placeholder_index":
-                return [(0.5, chunk) for chunk in chunks[:topK]]
+                return [[(idx, 0.5) for idx in range(min(topK, chunkCount))] for _ in range(len(queryEmbeddings))]
             
-            import faiss
-            D, I = index.search(queryEmbedding, topK)
-            results = []
-            for score, idx in zip(D[0], I[0]):
-                if idx < len(chunks):
-                    results.append((score, chunks[idx]))
-            return results
+            D, I = index.search(queryEmbeddings, topK)
+            return self._resultsToHits(D, I, chunkCount)
         except Exception as e:
             logger.error(f"Search failed: {str(e)}")
-            return []
+            return [[] for _ in range(len(queryEmbeddings))]
+    
+    def _resultsToHits(self, D, I, chunkCount: int) -> List[List[Tuple[int, float]]]:
+        return [
+            [(int(idx), float(score)) for score, idx in zip(rowScores, rowIds) if 0 <= idx < chunkCount]
+            for rowScores, rowIds in zip(D, I)
+        ]
     
-    def retrieveSupportChunksParallel(self, inputText: str) -> Tuple[Dict[str, List], Dict]:
+    def retrieveHits(self, inputText: str, generation: Optional[IndexGeneration] = None) -> Dict[str, List[Tuple[int, float]]]:
+        generation = generation or self.generation
         if self.encoder == "placeholder":
             logger.info("Using placeholder RAG retrieval")
-            logs = {"query": inputText}
-            support = {}
-            for name in ["constitution", "ipcSections", "ipcCase", "statutes", "qaTexts", "caseLaw"]:
-                if name in self.preloadedIndexes:
-                    _, chunks = self.preloadedIndexes[name]
-                    support[name] = chunks[:5] if chunks else []
-                else:
-                    support[name] = []
-            logs["supportChunksUsed"] = support
-            return support, logs
+            return self._placeholderHits(generation)
         
         try:
-            import faiss
-            queryEmbedding = self.encoder.encode([inputText], normalize_embeddings=True).astype('float32')
-            faiss.normalize_L2(queryEmbedding)
-            
-            logs = {"query": inputText}
-            
-            def retrieve(name):
-                if name not in self.preloadedIndexes:
-                    return name, []
-                idx, chunks = self.preloadedIndexes[name]
-                results = self.search(idx, chunks, queryEmbedding, 5)
-                return name, [c[1] for c in results]
-            
-            support = {}
-            with ThreadPoolExecutor(max_workers=6) as executor:
-                futures = [executor.submit(retrieve, name) for name in self.preloadedIndexes.keys()]
-                for f in futures:
-                    name, topChunks = f.result()
-                    support[name] = topChunks
-            
-            logs["supportChunksUsed"] = support
-            return support, logs
-            
+            return self._retrieveTexts([inputText], generation)[0]
         except Exception as e:
             logger.error(f"Error retrieving support chunks: {str(e)}")
             raise ValueError(f"Support chunk retrieval failed: {str(e)}")
     
-    def retrieveDualSupportChunks(self, inputText: str, geminiQueryModel):
+    async def retrieveHitsAsync(self, inputText: str, generation: Optional[IndexGeneration] = None) -> Dict[str, List[Tuple[int, float]]]:
+        generation = generation or self.generation
+        cached = self._cachedHits(inputText, generation)
+        if cached is not None:
+            return cached
+        if self.retrievalBatcher is None:
+            return await asyncio.to_thread(self.retrieveHits, inputText, generation)
         try:
-            geminiQuery = geminiQueryModel.generateSearchQueryFromCase(inputText, geminiQueryModel)
-        except:
-            geminiQuery = None
-
-        supportFromCase, _ = self.retrieveSupportChunksParallel(inputText)
-        supportFromQuery, _ = self.retrieveSupportChunksParallel(geminiQuery or inputText)
-
-        combinedSupport = {}
-        for key in supportFromCase:
-            combined = supportFromCase[key] + supportFromQuery[key]
-            seen = set()
-            unique = []
-            for chunk in combined:
-                if isinstance(chunk, str):
-                    rep = chunk
-                else:
-                    rep = chunk.get("text") or chunk.get("description") or chunk.get("section_desc") or str(chunk)
-                if rep not in seen:
-                    seen.add(rep)
-                    unique.append(chunk)
-                if len(unique) == 10:
-                    break
-            combinedSupport[key] = unique
-
-        return combinedSupport, geminiQuery
+            return await asyncio.wrap_future(self.retrievalBatcher.submit((inputText, generation)))
+        except Exception as e:
+            logger.error(f"Error retrieving support chunks: {str(e)}")
+            raise ValueError(f"Support chunk retrieval failed: {str(e)}")
+    
+    def _placeholderHits(self, generation: IndexGeneration) -> Dict[str, List[Tuple[int, float]]]:
+        hits = {}
+        for name in servedDomains():
+            chunkCount = len(generation.indexes[name][1]) if name in generation.indexes else 0
+            hits[name] = [(idx, 0.5) for idx in range(min(settings.top_k_results, chunkCount))]
+        return hits
+    
+    def _retrievalCacheKey(self, normalizedText: str, name: str, topK: int, indexVersion: str) -> Tuple[str, str, int, str]:
+        return normalizedText, name, topK, indexVersion
+    
+    def _cachedHits(self, inputText: str, generation: IndexGeneration) -> Optional[Dict[str, List[Tuple[int, float]]]]:
+        if self.retrievalCache is None or self.encoder == "placeholder":
+            return None
+        key = normalizeText(inputText)
+        cacheKeys = {name: self._retrievalCacheKey(key, name, settings.top_k_results, generation.version) for name in generation.indexes.keys()}
+        if any(self.retrievalCache.peek(cacheKey) is None for cacheKey in cacheKeys.values()):
+            return None
+        hits = {}
+        for name, cacheKey in cacheKeys.items():
+            domainHits = self.retrievalCache.get(cacheKey)
+            if domainHits is None:
+                return None
+            hits[name] = domainHits
+        with self._encodeStatsLock:
+            self._retrievalStats["queries"] += 1
+            self._retrievalStats["servedFromCache"] += 1
+        return hits
+    
+    def _retrieveBatchItems(self, items: List[Tuple[str, IndexGeneration]]) -> List[Dict[str, List[Tuple[int, float]]]]:
+        return self._retrieveTexts([text for text, _ in items], items[0][1])
+    
+    def _retrieveTexts(self, texts: List[str], generation: Optional[IndexGeneration] = None) -> List[Dict[str, List[Tuple[int, float]]]]:
+        generation = generation or self.generation
+        topK = settings.top_k_results
+        domains = list(generation.indexes.keys())
+        keys = [normalizeText(text) for text in texts]
+        results = [{} for _ in texts]
+        if self.retrievalCache is not None:
+            for row, key in enumerate(keys):
+                for name in domains:
+                    domainHits = self.retrievalCache.get(self._retrievalCacheKey(key, name, topK, generation.version))
+                    if domainHits is not None:
+                        results[row][name] = domainHits
+        
+        pending = [row for row in range(len(texts)) if len(results[row]) < len(domains)]
+        with self._encodeStatsLock:
+            self._retrievalStats["queries"] += len(texts)
+            self._retrievalStats["servedFromCache"] += len(texts) - len(pending)
+        if pending:
+            missingDomains = [name for name in domains if any(name not in results[row] for row in pending)]
+            passages = [self._queryPassages(texts[row]) for row in pending]
+            queryEmbeddings = self.encodeQueries([passage for group in passages for passage in group])
+            searched = self._retrieveBatch(queryEmbeddings, topK, missingDomains, generation)
+            offset = 0
+            for row, group in zip(pending, passages):
+                passageHits = searched[offset:offset + len(group)]
+                offset += len(group)
+                hits = passageHits[0] if len(group) == 1 else self._fusePassageHits(passageHits, topK, generation)
+                for name, domainHits in hits.items():
+                    if name not in results[row]:
+                        results[row][name] = domainHits
+                        if self.retrievalCache is not None:
+                            self.retrievalCache.put(self._retrievalCacheKey(keys[row], name, topK, generation.version), domainHits)
+        return [{name: row[name] for name in domains} for row in results]
+    
+    def _queryPassages(self, text: str) -> List[str]:
+        if not settings.long_query_mode:
+            return [text]
+        passages = splitPassages(text, settings.long_query_passage_words, settings.long_query_overlap_words, settings.long_query_max_passages)
+        if len(passages) > 1:
+            with self._encodeStatsLock:
+                self._retrievalStats["longQueries"] += 1
+                self._retrievalStats["passages"] += len(passages)
+        return passages
+    
+    def _fusePassageHits(self, passageHits: List[Dict[str, List[Tuple[int, float]]]], topK: int,
+                         generation: IndexGeneration) -> Dict[str, List[Tuple[int, float]]]:
+        fused = {}
+        for name in passageHits[0]:
+            fused[name] = fuseScores(
+                [hits[name] for hits in passageHits],
+                topK,
+                method=settings.long_query_fusion,
+                higherIsBetter=self.higherIsBetter(name, generation)
+            )
+        return fused
+    
+    def encodeQueries(self, texts: List[str]):
+        import faiss
+        import numpy as np
+        
+        keys = [normalizeText(text) for text in texts]
+        vectors = {key: self.embeddingCache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if missing:
+            start = time.perf_counter()
+            encoded = self.encoder.encode(missing, normalize_embeddings=True).astype('float32')
+            faiss.normalize_L2(encoded)
+            with self._encodeStatsLock:
+                self._encodeStats["calls"] += 1
+                self._encodeStats["textsEncoded"] += len(missing)
+                self._encodeStats["totalEncodeMs"] += (time.perf_counter() - start) * 1000
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+                self.embeddingCache.put(key, vector)
+        return np.stack([vectors[key] for key in keys])
+    
+    def _retrieveBatch(self, queryEmbeddings, topK: int, domainNames: Optional[List[str]] = None,
+                       generation: Optional[IndexGeneration] = None) -> List[Dict[str, List[Tuple[int, float]]]]:
+        generation = generation or self.generation
+        domainNames = list(generation.indexes.keys()) if domainNames is None else domainNames
+        domains = {name: generation.indexes[name] for name in domainNames}
+        unifiedDomains = [name for name, (idx, _) in domains.items() if isinstance(idx, UnifiedDomainView)]
+        
+        def retrieve(name):
+            idx, chunks = domains[name]
+            return name, self.searchIds(idx, len(chunks), queryEmbeddings, topK)
+        
+        perDomain = {}
+        if unifiedDomains:
+            try:
+                unifiedResults = generation.unifiedIndex.searchDomains(queryEmbeddings, topK, unifiedDomains)
+                for name, (D, I) in unifiedResults.items():
+                    perDomain[name] = self._resultsToHits(D, I, len(domains[name][1]))
+            except Exception as e:
+                logger.error(f"Unified search failed: {str(e)}")
+                perDomain.update({name: [[] for _ in range(len(queryEmbeddings))] for name in unifiedDomains})
+        separate = [name for name in domains if name not in perDomain]
+        perDomain.update(self._searchExecutor.map(retrieve, separate))
+        
+        return [{name: perDomain[name][row] for name in domains} for row in range(len(queryEmbeddings))]
+    
+    def supportFromHits(self, hits: Dict[str, List[Tuple[int, float]]], generation: Optional[IndexGeneration] = None) -> Dict[str, List]:
+        indexes = (generation or self.generation).indexes
+        support = {}
+        for name, domainHits in hits.items():
+            chunks = indexes[name][1] if name in indexes else []
+            support[name] = [chunks[idx] for idx, _ in domainHits]
+        return support
+    
+    def higherIsBetter(self, name: str, generation: Optional[IndexGeneration] = None) -> bool:
+        indexes = (generation or self.generation).indexes
+        index = indexes[name][0] if name in indexes else None
+        if not hasattr(index, "metric_type"):
+            return True
+        import faiss
+        
+        return index.metric_type != faiss.METRIC_L2
+    
+    def retrieveDualHits(self, inputText: str, geminiQuery: Optional[str],
+                         generation: Optional[IndexGeneration] = None) -> Dict[str, List[Tuple[int, float]]]:
+        generation = generation or self.generation
+        if self.encoder == "placeholder":
+            return self.fuseHits([self._placeholderHits(generation)], generation)
+        
+        try:
+            hitsFromCase, hitsFromQuery = self._retrieveTexts([inputText, geminiQuery or inputText], generation)
+        except Exception as e:
+            logger.error(f"Error retrieving support chunks: {str(e)}")
+            raise ValueError(f"Support chunk retrieval failed: {str(e)}")
+        return self.fuseHits([hitsFromCase, hitsFromQuery], generation)
     
     def areIndexesLoaded(self) -> bool:
         return len(self.preloadedIndexes) > 0
@@ -160,5 +559,38 @@ class RAGService:
     def getLoadedIndexes(self) -> List[str]:
         return list(self.preloadedIndexes.keys())
     
+    def getLoadStats(self) -> Dict[str, Any]:
+        generation = self.generation
+        stats = dict(generation.loadStats)
+        stats["memoryNow"] = processMemoryMb()
+        if isinstance(generation.indexes, LazyDomainIndexes):
+            stats["loadedDomains"] = generation.indexes.loadedDomains()
+        if generation.unifiedIndex is not None:
+            stats["unifiedIndex"] = generation.unifiedIndex.getStats()
+        stats["reload"] = {**self._reloadStats, "watchSeconds": settings.faiss_reload_watch_seconds}
+        return stats
+    
+    def getEncoderStats(self) -> Dict[str, Any]:
+        with self._encodeStatsLock:
+            stats = dict(self._encodeStats)
+        stats["averageEncodeMs"] = stats["totalEncodeMs"] / stats["calls"] if stats["calls"] else 0.0
+        stats["embeddingCache"] = self.embeddingCache.getStats()
+        stats["backend"] = settings.sentence_transformer_backend if isinstance(self.encoder, OnnxSentenceEncoder) else "torch"
+        return stats
+    
+    def getRetrievalCacheStats(self) -> Dict[str, Any]:
+        with self._encodeStatsLock:
+            stats = dict(self._retrievalStats)
+        stats["queryHitRate"] = stats["servedFromCache"] / stats["queries"] if stats["queries"] else 0.0
+        stats["indexVersion"] = self.indexVersion
+        if self.retrievalCache is None:
+            return {"enabled": False, **stats}
+        return {"enabled": True, **stats, "domainEntries": self.retrievalCache.getStats()}
+    
+    def getBatchingStats(self) -> Dict[str, Any]:
+        if self.retrievalBatcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.retrievalBatcher.getStats()}
+    
     def is_healthy(self) -> bool:
         return self.encoder is not None
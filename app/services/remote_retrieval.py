@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.services.batching import MicroBatcher
+from app.services.retrieval_backend import Hits, RetrievalBackend
+
+logger = logging.getLogger(__name__)
+
+class RemoteGeneration:
+    """Per-request pin for remote retrieval: the combined shard index version, the chunks shards returned with each hit
+    and the shards that failed during the request, with the domains they serve"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.chunks: Dict[Tuple[str, str], Any] = {}
+        self.failedShards: Dict[str, List[str]] = {}
+
+class RemoteRetrievalService(RetrievalBackend):
+    """Scatters queries to retrieval shard processes (shard_main.py) over HTTP and merges their per-domain top-k"""
+
+    def __init__(self, shardUrls: List[str], timeoutSeconds: float = 10.0):
+        import httpx
+
+        if not shardUrls:
+            raise ValueError("Remote retrieval needs at least one shard URL in RETRIEVAL_SHARD_URLS")
+        self.shardUrls = [url.rstrip("/") for url in shardUrls]
+        self.encoder = "remote"
+        self.client = httpx.Client(timeout=timeoutSeconds)
+        self._scatterExecutor = ThreadPoolExecutor(max_workers=len(self.shardUrls), thread_name_prefix="rag-scatter")
+        self._shardStatus: List[Optional[Dict[str, Any]]] = [None] * len(self.shardUrls)
+        self._shardVersions = [""] * len(self.shardUrls)
+        self._shardDomains: List[List[str]] = [[] for _ in self.shardUrls]
+        self._shardErrors = [0] * len(self.shardUrls)
+        self._statusRefreshedAt = 0.0
+        self._directions: Dict[str, bool] = {}
+        self._stats = {"requests": 0, "queries": 0, "shardCalls": 0, "shardErrors": 0, "partialRequests": 0, "totalScatterMs": 0.0}
+        self._statsLock = threading.Lock()
+        self._reloadLock = threading.Lock()
+        self.retrievalBatcher = None
+        self.refreshShards()
+        logger.info(f"Remote retrieval over {len(self.shardUrls)} shards: {', '.join(self.shardUrls)}")
+        if settings.retrieval_batching_enabled:
+            self.retrievalBatcher = MicroBatcher(
+                "remote-retrieval",
+                self._retrieveTexts,
+                maxBatchSize=settings.retrieval_max_batch_size,
+                maxWaitMs=settings.retrieval_max_wait_ms
+            )
+        if settings.retrieval_shard_status_seconds > 0:
+            threading.Thread(target=self._refreshShardsPeriodically, name="rag-shard-status", daemon=True).start()
+
+    @property
+    def generation(self) -> RemoteGeneration:
+        return RemoteGeneration(self.indexVersion)
+
+    @property
+    def indexVersion(self) -> str:
+        return hashlib.sha256("|".join(self._shardVersions).encode("utf-8")).hexdigest()[:12]
+
+    def _call(self, position: int, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        headers = {"X-Admin-Key": settings.admin_api_key} if settings.admin_api_key and path.startswith("/admin") else None
+        response = self.client.request(method, f"{self.shardUrls[position]}{path}", json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def _scatter(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+        def call(position):
+            try:
+                return position, self._call(position, method, path, payload)
+            except Exception as e:
+                logger.error(f"Shard {self.shardUrls[position]}{path} failed: {str(e)}")
+                return position, None
+
+        responses = list(self._scatterExecutor.map(call, range(len(self.shardUrls))))
+        with self._statsLock:
+            self._stats["shardCalls"] += len(responses)
+            for position, response in responses:
+                if response is None:
+                    self._stats["shardErrors"] += 1
+                    self._shardErrors[position] += 1
+        return responses
+
+    def refreshShards(self) -> int:
+        """Blocking status scatter; request handlers read the cached result that the background refresher keeps current"""
+        healthy = 0
+        for position, status in self._scatter("GET", "/status"):
+            self._shardStatus[position] = status
+            if status is not None:
+                self._shardVersions[position] = status["indexVersion"]
+                self._shardDomains[position] = status["domains"]
+                healthy += 1
+        self._statusRefreshedAt = time.monotonic()
+        return healthy
+
+    def _refreshShardsPeriodically(self):
+        while True:
+            time.sleep(settings.retrieval_shard_status_seconds)
+            try:
+                self.refreshShards()
+            except Exception as e:
+                logger.error(f"Shard status refresh failed: {str(e)}")
+
+    def _retrieveTexts(self, texts: List[str]) -> List[Tuple[Hits, Dict[Tuple[str, str], Any], Dict[str, List[str]]]]:
+        topK = settings.top_k_results
+        start = time.perf_counter()
+        scattered = self._scatter("POST", "/retrieve", {"texts": texts})
+        responses = [(position, response) for position, response in scattered if response is not None]
+        if not responses:
+            raise ValueError(f"All {len(self.shardUrls)} retrieval shards failed")
+        failed = {self.shardUrls[position]: self._shardDomains[position] for position, response in scattered if response is None}
+        if failed:
+            logger.warning(f"Partial retrieval: {len(failed)} of {len(self.shardUrls)} shards failed, missing domains: "
+                           f"{', '.join(sorted({name for names in failed.values() for name in names})) or 'unknown'}")
+
+        rows = [({}, {}, failed) for _ in texts]
+        for position, response in responses:
+            self._shardVersions[position] = response["indexVersion"]
+            self._directions.update(response["higherIsBetter"])
+            for (hits, chunks, _), shardHits in zip(rows, response["results"]):
+                for name, domainHits in shardHits.items():
+                    for idx, score, chunk in domainHits:
+                        hitId = f"{position}:{idx}"
+                        hits.setdefault(name, []).append((hitId, score))
+                        chunks[(name, hitId)] = chunk
+        for hits, _, _ in rows:
+            for name, domainHits in hits.items():
+                domainHits.sort(key=lambda hit: hit[1], reverse=self.higherIsBetter(name))
+                del domainHits[topK:]
+
+        with self._statsLock:
+            self._stats["requests"] += 1
+            self._stats["queries"] += len(texts)
+            self._stats["partialRequests"] += 1 if failed else 0
+            self._stats["totalScatterMs"] += (time.perf_counter() - start) * 1000
+        return rows
+
+    def _retrieveOne(self, inputText: str) -> Tuple[Hits, Dict[Tuple[str, str], Any], Dict[str, List[str]]]:
+        return self._retrieveTexts([inputText])[0]
+
+    def _pinResults(self, generation: RemoteGeneration, chunks: Dict[Tuple[str, str], Any], failed: Dict[str, List[str]]):
+        generation.chunks.update(chunks)
+        generation.failedShards.update(failed)
+
+    def retrieveHits(self, inputText: str, generation: Optional[RemoteGeneration] = None) -> Hits:
+        generation = generation or self.generation
+        try:
+            hits, chunks, failed = self._retrieveOne(inputText)
+        except Exception as e:
+            logger.error(f"Error retrieving support chunks: {str(e)}")
+            raise ValueError(f"Support chunk retrieval failed: {str(e)}")
+        self._pinResults(generation, chunks, failed)
+        return hits
+
+    async def retrieveHitsAsync(self, inputText: str, generation: Optional[RemoteGeneration] = None) -> Hits:
+        generation = generation or self.generation
+        try:
+            if self.retrievalBatcher is None:
+                hits, chunks, failed = await asyncio.to_thread(self._retrieveOne, inputText)
+            else:
+                hits, chunks, failed = await asyncio.wrap_future(self.retrievalBatcher.submit(inputText))
+        except Exception as e:
+            logger.error(f"Error retrieving support chunks: {str(e)}")
+            raise ValueError(f"Support chunk retrieval failed: {str(e)}")
+        self._pinResults(generation, chunks, failed)
+        return hits
+
+    def retrieveDualHits(self, inputText: str, geminiQuery: Optional[str], generation: Optional[RemoteGeneration] = None) -> Hits:
+        generation = generation or self.generation
+        try:
+            rows = self._retrieveTexts([inputText, geminiQuery or inputText])
+        except Exception as e:
+            logger.error(f"Error retrieving support chunks: {str(e)}")
+            raise ValueError(f"Support chunk retrieval failed: {str(e)}")
+        for _, chunks, failed in rows:
+            self._pinResults(generation, chunks, failed)
+        return self.fuseHits([hits for hits, _, _ in rows], generation)
+
+    def supportFromHits(self, hits: Hits, generation: Optional[RemoteGeneration] = None) -> Dict[str, List]:
+        chunks = (generation or self.generation).chunks
+        return {
+            name: [chunks[(name, hitId)] for hitId, _ in domainHits if (name, hitId) in chunks]
+            for name, domainHits in hits.items()
+        }
+
+    def failedShards(self, generation: Optional[RemoteGeneration] = None) -> Dict[str, List[str]]:
+        return dict((generation or self.generation).failedShards)
+
+    def higherIsBetter(self, name: str, generation: Optional[RemoteGeneration] = None) -> bool:
+        return self._directions.get(name, True)
+
+    def encodeQueries(self, texts: List[str]):
+        import numpy as np
+
+        for position in range(len(self.shardUrls)):
+            try:
+                return np.asarray(self._call(position, "POST", "/encode", {"texts": texts})["vectors"], dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Shard {self.shardUrls[position]} could not encode queries: {str(e)}")
+        raise ValueError("No retrieval shard could encode the queries")
+
+    def reloadIndexes(self) -> Dict[str, Any]:
+        if not self._reloadLock.acquire(blocking=False):
+            raise RuntimeError("Index reload already in progress")
+        try:
+            previousVersion = self.indexVersion
+            results = self._scatter("POST", "/admin/reload-indexes")
+            failed = [self.shardUrls[position] for position, response in results if response is None]
+            self.refreshShards()
+            if len(failed) == len(self.shardUrls):
+                raise ValueError("Index reload failed on every retrieval shard")
+            return {
+                "previousVersion": previousVersion,
+                "indexVersion": self.indexVersion,
+                "shards": {self.shardUrls[position]: response for position, response in results},
+                "failedShards": failed
+            }
+        finally:
+            self._reloadLock.release()
+
+    def startReload(self) -> bool:
+        if self._reloadLock.locked():
+            return False
+
+        def run():
+            try:
+                self.reloadIndexes()
+            except Exception as e:
+                logger.error(f"Index reload failed: {str(e)}")
+
+        threading.Thread(target=run, name="rag-index-reload", daemon=True).start()
+        return True
+
+    def is_healthy(self) -> bool:
+        return any(status is not None for status in self._shardStatus)
+
+    def areIndexesLoaded(self) -> bool:
+        return len(self.getLoadedIndexes()) > 0
+
+    def getLoadedIndexes(self) -> List[str]:
+        return list(dict.fromkeys(name for status in self._shardStatus if status is not None for name in status["domains"]))
+
+    def getLoadStats(self) -> Dict[str, Any]:
+        with self._statsLock:
+            partialRequests = self._stats["partialRequests"]
+            shardErrors = list(self._shardErrors)
+        return {
+            "backend": "remote",
+            "indexVersion": self.indexVersion,
+            "statusAgeSeconds": round(time.monotonic() - self._statusRefreshedAt, 1),
+            "partialRequests": partialRequests,
+            "shards": [
+                {"url": url, "healthy": status is not None, "failedCalls": errors, "domains": domains, **(status or {})}
+                for url, status, errors, domains in zip(self.shardUrls, self._shardStatus, shardErrors, self._shardDomains)
+            ]
+        }
+
+    def getEncoderStats(self) -> Dict[str, Any]:
+        with self._statsLock:
+            stats = dict(self._stats)
+        stats["averageScatterMs"] = stats["totalScatterMs"] / stats["requests"] if stats["requests"] else 0.0
+        stats["backend"] = "remote"
+        return stats
+
+    def getBatchingStats(self) -> Dict[str, Any]:
+        if self.retrievalBatcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.retrievalBatcher.getStats()}
+
+    def getRetrievalCacheStats(self) -> Dict[str, Any]:
+        return {"enabled": False, "servedBy": "shards", "indexVersion": self.indexVersion}
@@ -0,0 +1,153 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.services.fusion import fuseRankings
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_BACKENDS = ("local", "remote")
+
+Hits = Dict[str, List[Tuple[Any, float]]]
+
+class RetrievalBackend(ABC):
+    """Retrieval surface used by the API and pipeline: RAGService serves it in-process, RemoteRetrievalService from shard processes.
+    `generation` pins what one request's hits refer to; pass the same generation to every call made for that request."""
+
+    encoder: Any = None
+
+    @property
+    @abstractmethod
+    def generation(self) -> Any:
+        ...
+
+    @property
+    @abstractmethod
+    def indexVersion(self) -> str:
+        ...
+
+    @abstractmethod
+    def retrieveHits(self, inputText: str, generation: Any = None) -> Hits:
+        ...
+
+    @abstractmethod
+    async def retrieveHitsAsync(self, inputText: str, generation: Any = None) -> Hits:
+        ...
+
+    @abstractmethod
+    def retrieveDualHits(self, inputText: str, geminiQuery: Optional[str], generation: Any = None) -> Hits:
+        ...
+
+    @abstractmethod
+    def supportFromHits(self, hits: Hits, generation: Any = None) -> Dict[str, List]:
+        ...
+
+    @abstractmethod
+    def encodeQueries(self, texts: List[str]):
+        ...
+
+    @abstractmethod
+    def higherIsBetter(self, name: str, generation: Any = None) -> bool:
+        ...
+
+    @abstractmethod
+    def reloadIndexes(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def startReload(self) -> bool:
+        ...
+
+    @abstractmethod
+    def is_healthy(self) -> bool:
+        ...
+
+    @abstractmethod
+    def areIndexesLoaded(self) -> bool:
+        ...
+
+    @abstractmethod
+    def getLoadedIndexes(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def getLoadStats(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def getEncoderStats(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def getBatchingStats(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def getRetrievalCacheStats(self) -> Dict[str, Any]:
+        ...
+
+    def failedShards(self, generation: Any = None) -> Dict[str, List[str]]:
+        """Shards that failed while serving this generation's request, mapped to the domains missing from its hits"""
+        return {}
+
+    def retrieveSupportChunksParallel(self, inputText: str) -> Tuple[Dict[str, List], Dict]:
+        generation = self.generation
+        hits = self.retrieveHits(inputText, generation)
+        return self.supportFromHits(hits, generation), self._retrievalLogs(inputText, hits, generation)
+
+    async def retrieveSupportChunksAsync(self, inputText: str) -> Tuple[Dict[str, List], Dict]:
+        generation = self.generation
+        hits = await self.retrieveHitsAsync(inputText, generation)
+        return self.supportFromHits(hits, generation), self._retrievalLogs(inputText, hits, generation)
+
+    def retrieveDualSupportChunks(self, inputText: str, geminiQueryModel):
+        try:
+            geminiQuery = geminiQueryModel.generateSearchQueryFromCase(inputText, geminiQueryModel)
+        except:
+            geminiQuery = None
+
+        return self.retrieveDualSupportChunksForQuery(inputText, geminiQuery), geminiQuery
+
+    def retrieveDualSupportChunksForQuery(self, inputText: str, geminiQuery: Optional[str]) -> Dict[str, List]:
+        generation = self.generation
+        return self.supportFromHits(self.retrieveDualHits(inputText, geminiQuery, generation), generation)
+
+    def _retrievalLogs(self, inputText: str, hits: Hits, generation: Any) -> Dict[str, Any]:
+        logs = {
+            "query": inputText,
+            "supportChunksUsed": self.supportFromHits(hits, generation),
+            "supportHits": self.formatHits(hits),
+            "indexVersion": generation.version
+        }
+        failed = self.failedShards(generation)
+        if failed:
+            logs["failedShards"] = failed
+        return logs
+
+    def formatHits(self, hits: Hits) -> Dict[str, List[Dict[str, Any]]]:
+        return {name: [{"id": f"{name}:{idx}", "score": round(score, 6)} for idx, score in domainHits] for name, domainHits in hits.items()}
+
+    def fuseHits(self, hitSets: List[Hits], generation: Any = None) -> Hits:
+        fused = {}
+        for name in dict.fromkeys(name for hits in hitSets for name in hits):
+            rankings = [hits.get(name, []) for hits in hitSets]
+            fused[name] = fuseRankings(
+                rankings,
+                settings.max_unique_chunks,
+                method=settings.retrieval_fusion,
+                rrfK=settings.retrieval_rrf_k,
+                higherIsBetter=[self.higherIsBetter(name, generation)] * len(rankings)
+            )
+        return fused
+
+def createRetrievalService() -> RetrievalBackend:
+    if settings.retrieval_backend == "remote":
+        from app.services.remote_retrieval import RemoteRetrievalService
+
+        return RemoteRetrievalService(settings.retrieval_shard_urls, settings.retrieval_shard_timeout_seconds)
+    if settings.retrieval_backend != "local":
+        logger.warning(f"Unknown retrieval backend {settings.retrieval_backend} (expected one of {', '.join(RETRIEVAL_BACKENDS)}) - using local")
+    from app.services.rag_service import RAGService
+
+    return RAGService()
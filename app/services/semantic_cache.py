@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_MODES = ("return", "flag")
+
+class SemanticCaseCache:
+    """Recent case analyses indexed by normalized case embedding; lookups match by cosine similarity above a threshold"""
+
+    def __init__(self, maxEntries: int, threshold: float, ttlSeconds: float = 0.0, searchDepth: int = 8):
+        self.maxEntries = max(1, maxEntries)
+        self.threshold = threshold
+        self.ttlSeconds = max(0.0, ttlSeconds)
+        self.searchDepth = max(1, searchDepth)
+        self.index = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._nextId = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+    def _ensureIndex(self, dim: int):
+        import faiss
+
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def _removeIds(self, ids):
+        import numpy as np
+
+        if ids:
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+            for entryId in ids:
+                self._entries.pop(entryId, None)
+
+    def _expiredIds(self):
+        if not self.ttlSeconds:
+            return []
+        cutoff = time.monotonic() - self.ttlSeconds
+        return [entryId for entryId, entry in self._entries.items() if entry["createdAt"] <= cutoff]
+
+    def lookup(self, vector, variant: Hashable) -> Optional[Tuple[Any, float]]:
+        """Best prior result for the same variant (pipeline options + index version) at or above the threshold"""
+        import numpy as np
+
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            self._stats["lookups"] += 1
+            expired = self._expiredIds()
+            if expired:
+                self._removeIds(expired)
+                self._stats["expirations"] += len(expired)
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            D, I = self.index.search(query, min(self.searchDepth, self.index.ntotal))
+            for similarity, entryId in zip(D[0], I[0]):
+                if entryId < 0 or similarity < self.threshold:
+                    break
+                entry = self._entries.get(int(entryId))
+                if entry is not None and entry["variant"] == variant:
+                    self._entries.move_to_end(int(entryId))
+                    self._stats["hits"] += 1
+                    return entry["value"], float(similarity)
+        return None
+
+    def store(self, vector, variant: Hashable, value: Any):
+        import numpy as np
+
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            self._ensureIndex(vector.shape[1])
+            entryId = self._nextId
+            self._nextId += 1
+            self.index.add_with_ids(vector, np.asarray([entryId], dtype=np.int64))
+            self._entries[entryId] = {"variant": variant, "value": value, "createdAt": time.monotonic()}
+            self._stats["stores"] += 1
+            overflow = len(self._entries) - self.maxEntries
+            if overflow > 0:
+                self._removeIds(list(self._entries)[:overflow])
+                self._stats["evictions"] += overflow
+
+    def clear(self):
+        with self._lock:
+            if self.index is not None:
+                self.index.reset()
+            self._entries.clear()
+
+    def getStats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["hitRate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["maxEntries"] = self.maxEntries
+        stats["threshold"] = self.threshold
+        stats["ttlSeconds"] = self.ttlSeconds
+        return stats
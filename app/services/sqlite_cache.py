@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SqliteCacheStore:
+    """Persistent key/value tier; rows are keyed by (key, tag) so several versions of one key can share a file"""
+
+    def __init__(self, path: str, table: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT NOT NULL, tag TEXT NOT NULL, value TEXT NOT NULL, createdAt REAL NOT NULL, "
+            "PRIMARY KEY (key, tag))"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, tag: str, maxAgeSeconds: float = 0.0) -> Optional[str]:
+        minCreatedAt = time.time() - maxAgeSeconds if maxAgeSeconds > 0 else 0.0
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND tag = ? AND createdAt >= ?", (key, tag, minCreatedAt)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, tag: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, tag, value, createdAt) VALUES (?, ?, ?, ?)",
+                (key, tag, value, time.time())
+            )
+            self._conn.commit()
+
+    def purgeTagsWithoutPrefix(self, prefix: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE substr(tag, 1, ?) != ?", (len(prefix), prefix))
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} stale rows from {self.path}:{self.table}")
+        return cursor.rowcount
+
+    def purgeOlderThan(self, maxAgeSeconds: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE createdAt < ?", (time.time() - maxAgeSeconds,))
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} expired rows from {self.path}:{self.table}")
+        return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
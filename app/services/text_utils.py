@@ -0,0 +1,25 @@
+import hashlib
+import re
+import unicodedata
+from typing import List
+
+_whitespacePattern = re.compile(r"\s+")
+
+def normalizeText(text: str) -> str:
+    return _whitespacePattern.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def textHash(text: str) -> str:
+    return hashlib.sha256(normalizeText(text).encode("utf-8")).hexdigest()
+
+def splitPassages(text: str, passageWords: int, overlapWords: int, maxPassages: int) -> List[str]:
+    """Overlapping word windows; above maxPassages, evenly spaced windows are kept, always including the first and last"""
+    words = normalizeText(text).split(" ")
+    passageWords = max(1, passageWords)
+    if len(words) <= passageWords:
+        return [" ".join(words)]
+    stride = max(1, passageWords - max(0, overlapWords))
+    starts = list(range(0, len(words) - passageWords + stride, stride))
+    if len(starts) > maxPassages:
+        step = (len(starts) - 1) / max(1, maxPassages - 1)
+        starts = [starts[round(i * step)] for i in range(maxPassages)] if maxPassages > 1 else starts[:1]
+    return [" ".join(words[start:start + passageWords]) for start in starts]
@@ -0,0 +1,129 @@
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_ID_SHIFT = 40
+LOCAL_ID_MASK = (1 << DOMAIN_ID_SHIFT) - 1
+UNIFIED_INDEX_FILE = "unified.index"
+UNIFIED_META_FILE = "unified.meta.json"
+
+def domainIdRange(domainId: int) -> Tuple[int, int]:
+    return domainId << DOMAIN_ID_SHIFT, (domainId + 1) << DOMAIN_ID_SHIFT
+
+def indexSignature(indexPath: str) -> Dict[str, int]:
+    stat = os.stat(indexPath)
+    return {"size": stat.st_size, "mtimeNs": stat.st_mtime_ns}
+
+def writeUnifiedIndex(index, meta: Dict[str, Any], basePath: str):
+    import faiss
+
+    indexPath = os.path.join(basePath, UNIFIED_INDEX_FILE)
+    faiss.write_index(index, f"{indexPath}.tmp")
+    os.replace(f"{indexPath}.tmp", indexPath)
+    metaPath = os.path.join(basePath, UNIFIED_META_FILE)
+    with open(f"{metaPath}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f"{metaPath}.tmp", metaPath)
+    logger.info(f"Wrote unified index with {index.ntotal} vectors to {indexPath}")
+
+class UnifiedIndex:
+    """All domains in one IndexIDMap2; the domain id lives in the high bits of each vector id"""
+
+    def __init__(self, index, meta: Dict[str, Any], overfetch: int = 4):
+        self.index = index
+        self.meta = meta
+        self.overfetch = max(1, overfetch)
+        self.domainIds = {name: info["domainId"] for name, info in meta["domains"].items()}
+        self.domainNames = {domainId: name for name, domainId in self.domainIds.items()}
+        self.domainCounts = {name: info["ntotal"] for name, info in meta["domains"].items()}
+        self.metric_type = index.metric_type
+        self.ntotal = index.ntotal
+        self.stats = {"searches": 0, "queries": 0, "fallbackSearches": 0}
+
+    @classmethod
+    def load(cls, basePath: str, domainFiles: Dict[str, Tuple[str, str]], loadMode: str = "memory", overfetch: int = 4) -> Optional["UnifiedIndex"]:
+        from app.services.index_loading import readFaissIndex
+
+        indexPath = os.path.join(basePath, UNIFIED_INDEX_FILE)
+        metaPath = os.path.join(basePath, UNIFIED_META_FILE)
+        if not os.path.exists(indexPath) or not os.path.exists(metaPath):
+            logger.warning(f"Unified index not built at {indexPath} - run scripts.build_unified_index")
+            return None
+        with open(metaPath, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        for name, info in meta["domains"].items():
+            sourcePath = os.path.join(basePath, domainFiles[name][0])
+            if not os.path.exists(sourcePath) or indexSignature(sourcePath) != info["source"]:
+                logger.warning(f"Unified index is stale for {name} - re-run scripts.build_unified_index")
+                return None
+        return cls(readFaissIndex(indexPath, loadMode), meta, overfetch)
+
+    def domainView(self, name: str) -> "UnifiedDomainView":
+        return UnifiedDomainView(self, name)
+
+    def _emptyResults(self, rows: int, k: int):
+        import faiss
+        import numpy as np
+
+        fill = -np.inf if self.metric_type == faiss.METRIC_INNER_PRODUCT else np.inf
+        return np.full((rows, k), fill, dtype=np.float32), np.full((rows, k), -1, dtype=np.int64)
+
+    def searchDomain(self, queries, k: int, name: str):
+        import faiss
+
+        low, high = domainIdRange(self.domainIds[name])
+        params = faiss.SearchParameters(sel=faiss.IDSelectorRange(low, high))
+        D, I = self.index.search(queries, k, params=params)
+        I[I >= 0] &= LOCAL_ID_MASK
+        return D, I
+
+    def searchDomains(self, queries, k: int, domains: Sequence[str]) -> Dict[str, Tuple[Any, Any]]:
+        """One over-fetched search partitioned by domain; domains left short fall back to a range-filtered search"""
+        domains = [name for name in domains if name in self.domainIds]
+        results = {name: self._emptyResults(len(queries), k) for name in domains}
+        self.stats["searches"] += 1
+        self.stats["queries"] += len(queries)
+        if not domains or self.ntotal == 0:
+            return results
+
+        import numpy as np
+
+        fetch = min(self.ntotal, k * len(domains) * self.overfetch)
+        D, I = self.index.search(queries, fetch)
+        owners = np.where(I >= 0, I >> DOMAIN_ID_SHIFT, -1)
+        short = {}
+        for name in domains:
+            matches = owners == self.domainIds[name]
+            take = min(k, fetch)
+            order = np.argsort(~matches, axis=1, kind="stable")[:, :take]
+            found = np.take_along_axis(matches, order, axis=1)
+            domainD, domainI = results[name]
+            domainD[:, :take] = np.where(found, np.take_along_axis(D, order, axis=1), domainD[:, :take])
+            domainI[:, :take] = np.where(found, np.take_along_axis(I, order, axis=1) & LOCAL_ID_MASK, -1)
+            short[name] = np.flatnonzero(matches.sum(axis=1) < min(k, self.domainCounts[name]))
+
+        for name, rows in short.items():
+            if len(rows):
+                self.stats["fallbackSearches"] += 1
+                domainD, domainI = self.searchDomain(queries[rows], k, name)
+                results[name][0][rows] = domainD
+                results[name][1][rows] = domainI
+        return results
+
+    def getStats(self) -> Dict[str, Any]:
+        return {**self.stats, "ntotal": self.ntotal, "domains": dict(self.domainCounts), "overfetch": self.overfetch}
+
+class UnifiedDomainView:
+    """Per-domain index facade over a UnifiedIndex, returning domain-local ids"""
+
+    def __init__(self, unified: UnifiedIndex, name: str):
+        self.unified = unified
+        self.name = name
+        self.metric_type = unified.metric_type
+        self.ntotal = unified.domainCounts[name]
+
+    def search(self, queries, k: int):
+        return self.unified.searchDomain(queries, k, self.name)
@@ -0,0 +1,93 @@
+import argparse
+import os
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.index_builder import COMPRESSED_INDEX_TYPES, RerankingIndex, annIndexPath, applySearchParams, buildIndex, indexMemoryBytes, loadStoredVectors, vectorsPath
+from app.services.rag_service import DOMAIN_FILES
+
+
+def makeQueries(vectors, count, noise, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)
+    queries = np.asarray(vectors[np.sort(picks)], dtype=np.float32)
+    queries = queries + rng.normal(scale=noise, size=queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def timeSearch(index, queries, k):
+    latencies = []
+    ids = []
+    for row in range(len(queries)):
+        start = time.perf_counter()
+        _, I = index.search(queries[row:row + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(I[0])
+    return ids, statistics.median(latencies), statistics.quantiles(latencies, n=100)[98]
+
+
+def recallAt(truth, found, k):
+    return statistics.fmean(len(set(t[:k]) & set(f[:k]) - {-1}) / k for t, f in zip(truth, found))
+
+
+def main():
+    import faiss
+
+    parser = argparse.ArgumentParser(description="Recall@5/@10, query latency and resident index size of ANN / compressed index types against exact flat search")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--domain", required=True, choices=list(DOMAIN_FILES))
+    parser.add_argument("--types", nargs="+", default=["hnsw", "ivf-flat", "ivf-pq", "sq8", "pq"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--rerank-factor", type=int, nargs="+", default=[4, 10], help="exact re-ranking depth for compressed types (candidates = k * factor)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--use-built", action="store_true", help="benchmark indexes written by scripts.rebuild_index instead of building in memory")
+    args = parser.parse_args()
+
+    sourcePath = os.path.join(args.base_path, DOMAIN_FILES[args.domain][0])
+    metric = faiss.read_index(sourcePath).metric_type
+    vectors = loadStoredVectors(sourcePath)
+    queries = makeQueries(vectors, args.queries, args.noise, seed=7)
+
+    flat = buildIndex(vectors, "flat", metric=metric)
+    truth, flatP50, flatP99 = timeSearch(flat, queries, 10)
+    if not os.path.exists(vectorsPath(sourcePath)) and set(args.types) & set(COMPRESSED_INDEX_TYPES):
+        print(f"note: {vectorsPath(sourcePath)} missing, re-ranking reads in-memory vectors (run scripts.rebuild_index to save them)")
+    rerankVectors = loadStoredVectors(sourcePath, mmap=True)
+    print(f"{args.domain}: {len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries")
+    print(f"{'index':<10}{'param':<22}{'recall@5':>10}{'recall@10':>11}{'p50 ms':>9}{'p99 ms':>9}{'build s':>9}{'RAM MB':>9}")
+    print(f"{'flat':<10}{'-':<22}{1.0:>10.3f}{1.0:>11.3f}{flatP50:>9.3f}{flatP99:>9.3f}{'-':>9}{indexMemoryBytes(flat) / 2**20:>9.1f}")
+
+    for indexType in args.types:
+        start = time.perf_counter()
+        if args.use_built:
+            index = faiss.read_index(annIndexPath(sourcePath, indexType))
+        else:
+            index = buildIndex(vectors, indexType, metric=metric)
+        buildSeconds = time.perf_counter() - start
+        memoryMb = indexMemoryBytes(index) / 2**20
+        if indexType == "hnsw":
+            sweep = [("efSearch", v) for v in args.ef_search]
+        elif indexType.startswith("ivf"):
+            sweep = [("nprobe", v) for v in args.nprobe]
+        else:
+            sweep = [(None, None)]
+        for name, value in sweep:
+            if name:
+                applySearchParams(index, **{name: value})
+            variants = [("", index)]
+            if indexType in COMPRESSED_INDEX_TYPES:
+                variants += [(f" rerank={factor}", RerankingIndex(index, rerankVectors, factor)) for factor in args.rerank_factor]
+            for suffix, searchIndex in variants:
+                found, p50, p99 = timeSearch(searchIndex, queries, 10)
+                param = (f"{name}={value}" if name else "-") + suffix
+                print(f"{indexType:<10}{param:<22}{recallAt(truth, found, 5):>10.3f}{recallAt(truth, found, 10):>11.3f}"
+                      f"{p50:>9.3f}{p99:>9.3f}{buildSeconds:>9.2f}{memoryMb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.query_encoder import OnnxSentenceEncoder
+from app.services.rag_service import DOMAIN_FILES
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+SHORT_QUERIES = [
+    "IPC 420 cheating dishonest inducement",
+    "criminal breach of trust Section 406",
+    "Article 21 right to life personal liberty",
+    "bail conditions non-bailable offence",
+    "circumstantial evidence chain of circumstances",
+    "Section 302 murder common intention",
+]
+
+
+def loadTexts(path):
+    if not path:
+        return SHORT_QUERIES, SAMPLE_CASES
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    short = [text for text in texts if len(text.split()) <= 32]
+    return short or texts, [text for text in texts if len(text.split()) > 32] or texts
+
+
+def loadIndexes(basePath):
+    import faiss
+
+    indexes = {}
+    for name, (indexFile, _) in DOMAIN_FILES.items():
+        path = os.path.join(basePath, indexFile)
+        if os.path.exists(path):
+            indexes[name] = faiss.read_index(path)
+    return indexes
+
+
+def medianLatencyMs(encoder, texts, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            encoder.encode([text], normalize_embeddings=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def overlapAtK(indexes, reference, candidate, k):
+    overlaps = []
+    for index in indexes.values():
+        _, refIds = index.search(reference, k)
+        _, candIds = index.search(candidate, k)
+        overlaps.extend(len(set(r) & set(c) - {-1}) / k for r, c in zip(refIds, candIds))
+    return statistics.fmean(overlaps) if overlaps else float("nan")
+
+
+def main():
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+    parser = argparse.ArgumentParser(description="Cosine drift, retrieval overlap@k and latency of ONNX query-encoder backends against sentence-transformers")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--texts", help="optional file with one query or case text per line")
+    parser.add_argument("--backends", nargs="+", default=["onnx-fp32", "onnx-int8"])
+    parser.add_argument("--k", type=int, default=settings.top_k_results)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    shortTexts, longTexts = loadTexts(args.texts)
+    texts = shortTexts + longTexts
+    indexes = loadIndexes(args.base_path)
+    if not indexes:
+        print(f"No domain indexes under {args.base_path} - overlap@k will be skipped")
+
+    reference = SentenceTransformer(settings.sentence_transformer_model)
+    referenceVectors = np.asarray(reference.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    print(f"{len(shortTexts)} short / {len(longTexts)} long texts, {len(indexes)} domain indexes, k={args.k}")
+    print(f"{'backend':<11}{'mean drift':>12}{'max drift':>11}{f'overlap@{args.k}':>12}{'short ms':>10}{'long ms':>10}")
+    print(f"{'torch':<11}{0.0:>12.5f}{0.0:>11.5f}{1.0:>12.3f}"
+          f"{medianLatencyMs(reference, shortTexts, args.repeats):>10.2f}{medianLatencyMs(reference, longTexts, args.repeats):>10.2f}")
+
+    for backend in args.backends:
+        encoder = OnnxSentenceEncoder(settings.sentence_transformer_model, backend, settings.sentence_transformer_onnx_intra_op_threads)
+        vectors = encoder.encode(texts, normalize_embeddings=True)
+        drift = 1.0 - (vectors * referenceVectors).sum(axis=1)
+        overlap = overlapAtK(indexes, referenceVectors, vectors, args.k)
+        print(f"{backend:<11}{drift.mean():>12.5f}{drift.max():>11.5f}{overlap:>12.3f}"
+              f"{medianLatencyMs(encoder, shortTexts, args.repeats):>10.2f}{medianLatencyMs(encoder, longTexts, args.repeats):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
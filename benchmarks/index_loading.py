@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODES = {
+    "memory-serial": {"FAISS_LOAD_MODE": "memory", "FAISS_PARALLEL_LOAD": "false", "FAISS_LAZY_LOAD": "false"},
+    "memory-parallel": {"FAISS_LOAD_MODE": "memory", "FAISS_PARALLEL_LOAD": "true", "FAISS_LAZY_LOAD": "false"},
+    "mmap-parallel": {"FAISS_LOAD_MODE": "mmap", "FAISS_PARALLEL_LOAD": "true", "FAISS_LAZY_LOAD": "false"},
+    "mmap-lazy": {"FAISS_LOAD_MODE": "mmap", "FAISS_PARALLEL_LOAD": "true", "FAISS_LAZY_LOAD": "true"},
+}
+
+WORKER_SCRIPT = """
+import json
+from app.services.rag_service import RAGService
+service = RAGService()
+stats = service.getLoadStats()
+print(json.dumps({"startupSeconds": stats["startupSeconds"], "before": stats["memoryBefore"], "after": stats["memoryNow"]}))
+"""
+
+
+def runMode(env):
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FAISS index loading modes (startup time and per-worker memory)")
+    parser.add_argument("--modes", nargs="*", default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'mode':<18}{'startup s':>10}{'rss +MB':>10}{'pss +MB':>10}{'private +MB':>13}")
+    for mode in args.modes:
+        stats = runMode(MODES[mode])
+        before, after = stats["before"], stats["after"]
+        delta = lambda key: after.get(key, 0.0) - before.get(key, 0.0)
+        private = delta("private_cleanMb") + delta("private_dirtyMb")
+        print(f"{mode:<18}{stats['startupSeconds']:>10.3f}{delta('rssMb'):>10.1f}{delta('pssMb'):>10.1f}{private:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
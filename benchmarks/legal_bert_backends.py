@@ -0,0 +1,78 @@
+import argparse
+import json
+import statistics
+import time
+
+from app.services.legal_bert import LegalBertService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+BACKENDS = ["torch", "onnx-fp32", "onnx-int8"]
+
+
+def loadSamples(path, limit):
+    if not path:
+        return [(text, None) for text in SAMPLE_CASES]
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = record.get("label")
+            samples.append((record["text"], None if label is None else int(label)))
+            if limit and len(samples) >= limit:
+                break
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy parity and latency of LegalBERT inference backends")
+    parser.add_argument("--samples", help="held-out JSONL file with 'text' and optional 'label' (1 = guilty)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = loadSamples(args.samples, args.limit)
+    texts = [text for text, _ in samples]
+    labels = [label for _, label in samples]
+
+    results = {}
+    for backend in BACKENDS:
+        service = LegalBertService(backend=backend)
+        if service.get_backend() != backend or not service.is_model_loaded():
+            print(f"{backend}: unavailable, skipped")
+            continue
+        service.predict(texts[0])
+        latencies = []
+        predictions = []
+        for _ in range(args.repeats):
+            predictions = []
+            for text in texts:
+                start = time.perf_counter()
+                predictions.append(service.predict(text))
+                latencies.append((time.perf_counter() - start) * 1000)
+        results[backend] = (predictions, latencies)
+
+    if "torch" not in results:
+        print("torch backend unavailable - no parity baseline")
+        return
+
+    reference = results["torch"][0]
+    print(f"{'backend':<12}{'p50 ms':>10}{'mean ms':>10}{'agree':>8}{'max |dp|':>10}{'accuracy':>10}")
+    for backend, (predictions, latencies) in results.items():
+        agreement = sum(p.verdict == r.verdict for p, r in zip(predictions, reference)) / len(reference)
+        maxDrift = max(
+            max(abs(a - b) for a, b in zip(p.probabilities, r.probabilities))
+            for p, r in zip(predictions, reference)
+        )
+        labelled = [(p, label) for p, label in zip(predictions, labels) if label is not None]
+        accuracy = (
+            f"{sum((p.verdict == 'guilty') == (label == 1) for p, label in labelled) / len(labelled):.3f}"
+            if labelled else "n/a"
+        )
+        print(f"{backend:<12}{statistics.median(latencies):>10.2f}{statistics.fmean(latencies):>10.2f}"
+              f"{agreement:>8.3f}{maxDrift:>10.4f}{accuracy:>10}")
+
+
+if __name__ == "__main__":
+    main()
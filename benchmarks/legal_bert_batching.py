@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.legal_bert import LegalBertService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+
+async def runLoad(predictFn, concurrency, requests):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await predictFn(SAMPLE_CASES[i % len(SAMPLE_CASES)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, statistics.median(latencies), statistics.quantiles(latencies, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained LegalBERT throughput with and without micro-batching")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=256)
+    args = parser.parse_args()
+
+    service = LegalBertService()
+    if not service.is_model_loaded():
+        print("LegalBERT checkpoint not found - numbers reflect placeholder mode only")
+    service.predict(SAMPLE_CASES[0])
+
+    async def unbatched(text):
+        return await asyncio.to_thread(service.predict, text)
+
+    print(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    rps, p50, p99 = asyncio.run(runLoad(unbatched, args.concurrency, args.requests))
+    print(f"{'unbatched':<12}{rps:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+    if service.batcher is None:
+        print("micro-batching disabled via LEGAL_BERT_BATCHING_ENABLED")
+        return
+    rps, p50, p99 = asyncio.run(runLoad(service.predictAsync, args.concurrency, args.requests))
+    print(f"{'batched':<12}{rps:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+    print(service.getBatchingStats())
+
+
+if __name__ == "__main__":
+    main()
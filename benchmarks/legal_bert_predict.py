@@ -0,0 +1,53 @@
+import argparse
+import time
+
+from app.services.legal_bert import LegalBertService
+
+SAMPLE_CASES = [
+    "The accused was found in possession of stolen property and failed to provide a valid explanation.",
+    "The Petitioner entered into a contract with the Respondent for the creation of an e-commerce website against an advance payment of Rs. 1,00,000. The Respondent repeatedly delayed delivery and submitted a non-functional version, and the Petitioner alleges cheating and criminal breach of trust under IPC Sections 420 and 406.",
+    "The appellant was convicted under Section 302 IPC on the basis of circumstantial evidence. The chain of circumstances was not complete and the recovery of the weapon was not proved by independent witnesses.",
+    "The respondent, a public servant, was charged under the Prevention of Corruption Act for demanding a bribe. The trap witness turned hostile and the tainted currency notes were recovered from the drawer of the table and not from the person of the accused.",
+]
+
+
+def measureCpuMs(fn, texts, iterations):
+    startCpu = time.process_time()
+    startWall = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            fn(text)
+    requests = iterations * len(texts)
+    cpuMs = (time.process_time() - startCpu) * 1000 / requests
+    wallMs = (time.perf_counter() - startWall) * 1000 / requests
+    return cpuMs, wallMs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request cost of predictVerdict+getConfidence against predict()")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    service = LegalBertService()
+    if not service.is_model_loaded():
+        print("LegalBERT checkpoint not found - numbers reflect placeholder mode only")
+
+    service.predict(SAMPLE_CASES[0])
+
+    def legacyPath(text):
+        service.predictVerdict(text)
+        service.getConfidence(text)
+
+    legacyCpu, legacyWall = measureCpuMs(legacyPath, SAMPLE_CASES, args.iterations)
+    singleCpu, singleWall = measureCpuMs(service.predict, SAMPLE_CASES, args.iterations)
+
+    print(f"device: {service.get_device()}")
+    print(f"{'path':<32}{'cpu ms/req':>12}{'wall ms/req':>14}")
+    print(f"{'predictVerdict + getConfidence':<32}{legacyCpu:>12.2f}{legacyWall:>14.2f}")
+    print(f"{'predict':<32}{singleCpu:>12.2f}{singleWall:>14.2f}")
+    if legacyCpu > 0:
+        print(f"cpu time saved per request: {legacyCpu - singleCpu:.2f} ms ({(1 - singleCpu / legacyCpu) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
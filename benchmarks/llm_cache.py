@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.gemini_service import GeminiService
+from app.services.legal_bert import LegalBertService
+from app.services.pipeline import CaseAnalysisPipeline
+from app.services.retrieval_backend import createRetrievalService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+
+async def runBatch(pipeline, cases, mode):
+    start = time.perf_counter()
+    statuses = []
+    for caseText in cases:
+        _, evaluation = await pipeline.run(caseText, mode)
+        statuses.extend(evaluation.get("llmCache", {}).values())
+    return time.perf_counter() - start, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch rerun time with a cold, warm (memory) and reopened (disk) LLM response cache")
+    parser.add_argument("--mode", default="gemini", choices=["gemini", "none"], help="query generation mode for the batch")
+    args = parser.parse_args()
+
+    settings.llm_cache_enabled = True
+    settings.llm_cache_path = os.path.join(tempfile.mkdtemp(prefix="llm_cache_"), "responses.db")
+    legalBert, retrieval = LegalBertService(), createRetrievalService()
+    gemini = GeminiService()
+    if not gemini.is_configured():
+        parser.error("needs GEMINI_API_KEY")
+
+    print(f"{len(SAMPLE_CASES)} sample cases, cache at {settings.llm_cache_path}")
+    print(f"{'run':<8}{'seconds':>10}  LLM calls served from cache")
+    for label in ("cold", "memory", "disk"):
+        if label == "disk":
+            gemini = GeminiService()
+        pipeline = CaseAnalysisPipeline(legalBert, retrieval, gemini)
+        seconds, statuses = asyncio.run(runBatch(pipeline, SAMPLE_CASES, args.mode))
+        served = sum(status in ("memory", "disk") for status in statuses)
+        print(f"{label:<8}{seconds:>10.2f}  {served}/{len(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.gemini_service import GeminiService
+from app.services.prompt_packer import estimateTokens
+from app.services.rag_service import RAGService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+
+def retrieveSupport(service, caseText):
+    generation = service.generation
+    hits = service.fuseHits([service.retrieveHits(caseText, generation)], generation)
+    scores = {name: [score for _, score in domainHits] for name, domainHits in hits.items()}
+    return service.supportFromHits(hits, generation), scores
+
+
+def buildPrompts(gemini, cases, packing, referenceTokens):
+    settings.gemini_prompt_packing = packing
+    settings.gemini_prompt_reference_tokens = referenceTokens
+    return [gemini.buildGeminiPrompt(caseText, "guilty", 0.72, support, caseText, scores) for caseText, support, scores in cases]
+
+
+def measureLatency(gemini, prompts):
+    latencies, promptTokens = [], []
+    for prompt in prompts:
+        start = time.perf_counter()
+        response = gemini.client.generate_content(prompt)
+        latencies.append((time.perf_counter() - start) * 1000)
+        usage = getattr(response, "usage_metadata", None)
+        promptTokens.append(getattr(usage, "prompt_token_count", 0) or 0)
+    return statistics.median(latencies), statistics.fmean(promptTokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size (and optionally Gemini latency) of the unpacked judge prompt against token-budget packing")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[1000, 2000, 3000])
+    parser.add_argument("--chunk-tokens", type=int, default=settings.gemini_prompt_chunk_tokens)
+    parser.add_argument("--live", action="store_true", help="also call Gemini with each prompt (needs GEMINI_API_KEY)")
+    args = parser.parse_args()
+
+    service = RAGService()
+    gemini = GeminiService()
+    if args.live and not gemini.is_configured():
+        parser.error("--live needs GEMINI_API_KEY")
+    settings.gemini_prompt_chunk_tokens = args.chunk_tokens
+    cases = [(caseText, *retrieveSupport(service, caseText)) for caseText in SAMPLE_CASES]
+    print(f"{len(cases)} sample cases, {sum(len(chunks) for _, support, _ in cases for chunks in support.values()) / len(cases):.1f} retrieved chunks per case")
+
+    variants = [("unpacked", False, 0)] + [(f"budget {budget}", True, budget) for budget in args.budgets]
+    header = f"{'variant':<14}{'chars':>9}{'~tokens':>9}"
+    print(header + (f"{'gemini tokens':>15}{'p50 ms':>10}" if args.live else ""))
+    for label, packing, budget in variants:
+        prompts = buildPrompts(gemini, cases, packing, budget)
+        row = f"{label:<14}{statistics.fmean(len(p) for p in prompts):>9.0f}{statistics.fmean(estimateTokens(p) for p in prompts):>9.0f}"
+        if args.live:
+            p50, promptTokens = measureLatency(gemini, prompts)
+            row += f"{promptTokens:>15.0f}{p50:>10.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.gemini_service import GeminiService
+from app.services.keyword_query import LocalQueryGenerator
+from app.services.retrieval_backend import createRetrievalService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+
+def hitIds(service, query, generation):
+    hits = service.retrieveHits(query, generation)
+    return {name: {idx for idx, _ in domainHits} for name, domainHits in hits.items()}
+
+
+def fusedIds(service, caseText, query, generation):
+    hits = service.fuseHits([service.retrieveHits(caseText, generation), service.retrieveHits(query, generation)], generation)
+    return {name: {idx for idx, _ in domainHits} for name, domainHits in hits.items()}
+
+
+def overlap(left, right):
+    return len(left & right) / len(left | right) if left | right else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local keyword query generation latency, and retrieval overlap against Gemini-generated queries")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--max-terms", type=int, default=settings.local_query_max_terms)
+    args = parser.parse_args()
+
+    service = createRetrievalService()
+    generator = LocalQueryGenerator(service, args.max_terms, settings.local_query_idf_max_docs)
+    generator.build()
+    stats = generator.getStats()
+    print(f"lexicon: {stats['lexiconSize']} phrases, IDF over {stats['idfDocuments']} chunks, built in {stats['buildSeconds']}s")
+
+    localQueries = [generator.generate(caseText) or caseText for caseText in SAMPLE_CASES]
+    latencies = []
+    for _ in range(args.iterations):
+        for caseText in SAMPLE_CASES:
+            start = time.perf_counter()
+            generator.generate(caseText)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    print(f"local query: p50 {statistics.median(latencies):.0f} us, p99 {latencies[int(len(latencies) * 0.99)]:.0f} us")
+
+    gemini = GeminiService()
+    if not gemini.is_configured():
+        for caseText, query in zip(SAMPLE_CASES, localQueries):
+            print(f"\n{caseText[:80]}...\n  local:  {query}")
+        print("\nGEMINI_API_KEY not set - skipping the retrieval overlap comparison")
+        return
+
+    generation = service.generation
+    perDomain, fused, geminiMs = {}, [], []
+    for caseText, localQuery in zip(SAMPLE_CASES, localQueries):
+        start = time.perf_counter()
+        geminiQuery = gemini.generateSearchQueryFromCase(caseText) or caseText
+        geminiMs.append((time.perf_counter() - start) * 1000)
+        print(f"\n{caseText[:80]}...\n  local:  {localQuery}\n  gemini: {geminiQuery}")
+        localHits, geminiHits = hitIds(service, localQuery, generation), hitIds(service, geminiQuery, generation)
+        for name in geminiHits:
+            perDomain.setdefault(name, []).append(overlap(localHits.get(name, set()), geminiHits[name]))
+        localFused, geminiFused = fusedIds(service, caseText, localQuery, generation), fusedIds(service, caseText, geminiQuery, generation)
+        fused.append(statistics.fmean(overlap(localFused.get(name, set()), geminiFused[name]) for name in geminiFused))
+
+    print(f"\ngemini query: p50 {statistics.median(geminiMs):.0f} ms")
+    print(f"{'domain':<14}{'query-only Jaccard':>20}")
+    for name, values in perDomain.items():
+        print(f"{name:<14}{statistics.fmean(values):>20.3f}")
+    print(f"{'fused':<14}{statistics.fmean(fused):>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
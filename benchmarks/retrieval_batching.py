@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.rag_service import RAGService
+from benchmarks.legal_bert_predict import SAMPLE_CASES
+
+
+async def runLoad(retrieveFn, concurrency, requests, runId):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await retrieveFn(f"{SAMPLE_CASES[i % len(SAMPLE_CASES)]} [{runId}-{i}]")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, statistics.median(latencies), statistics.quantiles(latencies, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained retrieval throughput (encode + six-domain search) with and without cross-request batching")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=256)
+    args = parser.parse_args()
+
+    service = RAGService()
+    if service.encoder == "placeholder":
+        raise SystemExit("sentence-transformers is required for this benchmark")
+    service.retrieveSupportChunksParallel(SAMPLE_CASES[0])
+
+    async def unbatched(text):
+        return await asyncio.to_thread(service.retrieveSupportChunksParallel, text)
+
+    print(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    rps, p50, p99 = asyncio.run(runLoad(unbatched, args.concurrency, args.requests, "unbatched"))
+    print(f"{'unbatched':<12}{rps:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+    if service.retrievalBatcher is None:
+        print("retrieval batching disabled via RETRIEVAL_BATCHING_ENABLED")
+        return
+    rps, p50, p99 = asyncio.run(runLoad(service.retrieveSupportChunksAsync, args.concurrency, args.requests, "batched"))
+    print(f"{'batched':<12}{rps:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+    print(service.getBatchingStats())
+    print(service.getEncoderStats())
+
+
+if __name__ == "__main__":
+    main()
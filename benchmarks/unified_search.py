@@ -0,0 +1,74 @@
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.services.index_builder import loadStoredVectors
+from app.services.rag_service import DOMAIN_FILES
+from app.services.unified_index import UnifiedIndex
+
+
+def sampleQueries(basePath, domains, count, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    pool = np.concatenate([np.asarray(loadStoredVectors(os.path.join(basePath, DOMAIN_FILES[name][0])), dtype=np.float32) for name in domains])
+    queries = pool[rng.choice(len(pool), size=count)] + rng.normal(scale=0.02, size=(count, pool.shape[1])).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def timeRuns(fn, queries, batchSize, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for start in range(0, len(queries), batchSize):
+            began = time.perf_counter()
+            fn(queries[start:start + batchSize])
+            latencies.append((time.perf_counter() - began) * 1000)
+    return statistics.median(latencies), len(queries) * repeats / (sum(latencies) / 1000)
+
+
+def main():
+    import faiss
+
+    parser = argparse.ArgumentParser(description="Per-domain fan-out vs one unified multi-domain search")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 8])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--overfetch", type=int, default=settings.faiss_unified_overfetch)
+    args = parser.parse_args()
+
+    unified = UnifiedIndex.load(args.base_path, DOMAIN_FILES, overfetch=args.overfetch)
+    if unified is None:
+        raise SystemExit("Build the unified index first: python -m scripts.build_unified_index")
+    domains = list(unified.domainIds)
+    indexes = {name: faiss.read_index(os.path.join(args.base_path, DOMAIN_FILES[name][0])) for name in domains}
+    queries = sampleQueries(args.base_path, domains, args.queries, seed=11)
+
+    executor = ThreadPoolExecutor(max_workers=len(domains))
+
+    def fanOutPerCall(batch):
+        with ThreadPoolExecutor(max_workers=len(domains)) as pool:
+            return list(pool.map(lambda name: indexes[name].search(batch, args.top_k), domains))
+
+    def fanOutPersistent(batch):
+        return list(executor.map(lambda name: indexes[name].search(batch, args.top_k), domains))
+
+    def unifiedSearch(batch):
+        return unified.searchDomains(batch, args.top_k, domains)
+
+    print(f"{len(domains)} domains, {unified.ntotal} vectors, top-{args.top_k}, overfetch {args.overfetch}")
+    print(f"{'strategy':<22}{'batch':>6}{'p50 ms':>9}{'queries/s':>11}")
+    for batchSize in args.batch_sizes:
+        for label, fn in (("per-call executor", fanOutPerCall), ("persistent executor", fanOutPersistent), ("unified", unifiedSearch)):
+            p50, throughput = timeRuns(fn, queries, batchSize, args.repeats)
+            print(f"{label:<22}{batchSize:>6}{p50:>9.3f}{throughput:>11.0f}")
+    print(f"unified fallback searches: {unified.getStats()['fallbackSearches']}")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
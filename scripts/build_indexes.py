@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+
+from app.core.config import settings
+from app.services.chunk_store import chunkStorePath, primaryText, sourceSignature, writeChunkStore
+from app.services.index_builder import buildIndex, vectorsPath
+from app.services.onnx_runtime import ONNX_BACKENDS
+from app.services.rag_service import DOMAIN_FILES
+from app.services.text_utils import splitPassages
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = (".txt", ".md")
+
+_workerEncoder = None
+
+
+def manifestPath(indexPath):
+    return f"{os.path.splitext(indexPath)[0]}.manifest.json"
+
+
+def chunkHash(chunk):
+    return hashlib.sha256(json.dumps(chunk, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def loadEncoder():
+    if settings.sentence_transformer_backend in ONNX_BACKENDS:
+        from app.services.query_encoder import OnnxSentenceEncoder
+
+        return OnnxSentenceEncoder(settings.sentence_transformer_model, settings.sentence_transformer_backend,
+                                   settings.sentence_transformer_onnx_intra_op_threads)
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(settings.sentence_transformer_model)
+
+
+def initWorker():
+    global _workerEncoder
+    _workerEncoder = loadEncoder()
+
+
+def encodeShard(shard):
+    import numpy as np
+
+    texts, batchSize = shard
+    return np.asarray(_workerEncoder.encode(texts, batch_size=batchSize, normalize_embeddings=True), dtype=np.float32)
+
+
+def readCorpus(domainDir, chunkWords, overlapWords):
+    chunks = []
+    for root, _, files in sorted(os.walk(domainDir)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension in TEXT_EXTENSIONS:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                if text.strip():
+                    chunks.extend(splitPassages(text, chunkWords, overlapWords, sys.maxsize))
+            elif extension == ".jsonl":
+                with open(path, "r", encoding="utf-8") as f:
+                    chunks.extend(json.loads(line) for line in f if line.strip())
+            elif extension == ".json":
+                with open(path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                chunks.extend(records if isinstance(records, list) else [records])
+    return chunks
+
+
+def encoderSignature():
+    return {"model": settings.sentence_transformer_model, "backend": settings.sentence_transformer_backend}
+
+
+def loadPrevious(indexPath):
+    import numpy as np
+
+    if not os.path.exists(manifestPath(indexPath)) or not os.path.exists(vectorsPath(indexPath)):
+        return {}, None
+    with open(manifestPath(indexPath), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if any(manifest.get(field) != value for field, value in encoderSignature().items()):
+        logger.info(f"Encoder model or backend changed since the last build of {indexPath} - re-encoding everything")
+        return {}, None
+    vectors = np.load(vectorsPath(indexPath), mmap_mode="r")
+    if vectors.ndim != 2 or vectors.shape[1] != manifest.get("dim") or len(vectors) != len(manifest["hashes"]):
+        logger.info(f"Stored vectors for {indexPath} do not match its manifest - re-encoding everything")
+        return {}, None
+    return {digest: position for position, digest in enumerate(manifest["hashes"])}, vectors
+
+
+def encodeTexts(texts, batchSize, pool):
+    import numpy as np
+
+    if not texts:
+        return None
+    shardSize = batchSize * 4
+    shards = [(texts[start:start + shardSize], batchSize) for start in range(0, len(texts), shardSize)]
+    if pool is None:
+        return np.concatenate([encodeShard(shard) for shard in shards])
+    return np.concatenate(list(pool.imap(encodeShard, shards)))
+
+
+def writeChunks(chunks, chunkPath):
+    tmpPath = f"{chunkPath}.tmp"
+    if chunkPath.endswith(".pkl"):
+        with open(tmpPath, "wb") as f:
+            pickle.dump(chunks, f)
+    else:
+        with open(tmpPath, "w", encoding="utf-8") as f:
+            json.dump(chunks, f, ensure_ascii=False)
+    os.replace(tmpPath, chunkPath)
+
+
+def buildDomain(domain, corpusDir, outputDir, args, pool):
+    import faiss
+    import numpy as np
+
+    indexFile, chunkFile = DOMAIN_FILES[domain]
+    indexPath = os.path.join(outputDir, indexFile)
+    chunkPath = os.path.join(outputDir, chunkFile)
+    chunks = readCorpus(os.path.join(corpusDir, domain), args.chunk_words, args.overlap_words)
+    if not chunks:
+        logger.warning(f"Skipping {domain}: no corpus files under {os.path.join(corpusDir, domain)}")
+        return
+
+    hashes = [chunkHash(chunk) for chunk in chunks]
+    previous, previousVectors = ({}, None) if args.full else loadPrevious(indexPath)
+    toEncode = sorted({position for position, digest in enumerate(hashes) if digest not in previous})
+    start = time.perf_counter()
+    encoded = encodeTexts([primaryText(chunks[position]) for position in toEncode], args.batch_size, pool)
+    if encoded is not None and previousVectors is not None and encoded.shape[1] != previousVectors.shape[1]:
+        logger.info(f"{domain}: encoder dim {encoded.shape[1]} differs from stored dim {previousVectors.shape[1]} - re-encoding everything")
+        previous, previousVectors = {}, None
+        toEncode = list(range(len(chunks)))
+        encoded = encodeTexts([primaryText(chunk) for chunk in chunks], args.batch_size, pool)
+    encodeSeconds = time.perf_counter() - start
+
+    dim = encoded.shape[1] if encoded is not None else previousVectors.shape[1]
+    vectors = np.empty((len(chunks), dim), dtype=np.float32)
+    if encoded is not None:
+        vectors[toEncode] = encoded
+    for position, digest in enumerate(hashes):
+        if digest in previous:
+            vectors[position] = previousVectors[previous[digest]]
+
+    index = buildIndex(vectors, "flat", metric=faiss.METRIC_INNER_PRODUCT)
+    np.save(f"{vectorsPath(indexPath)}.tmp.npy", vectors)
+    os.replace(f"{vectorsPath(indexPath)}.tmp.npy", vectorsPath(indexPath))
+    faiss.write_index(index, f"{indexPath}.tmp")
+    os.replace(f"{indexPath}.tmp", indexPath)
+    writeChunks(chunks, chunkPath)
+    writeChunkStore(chunks, chunkStorePath(chunkPath), sourceSignature(chunkPath))
+    with open(f"{manifestPath(indexPath)}.tmp", "w", encoding="utf-8") as f:
+        json.dump({**encoderSignature(), "dim": dim, "hashes": hashes}, f)
+    os.replace(f"{manifestPath(indexPath)}.tmp", manifestPath(indexPath))
+
+    reused = len(chunks) - len(toEncode)
+    rate = len(toEncode) / encodeSeconds if toEncode and encodeSeconds else 0.0
+    logger.info(f"{domain}: {len(chunks)} chunks, {len(toEncode)} encoded ({rate:.1f}/s), {reused} reused -> {indexPath}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Chunk per-domain corpora, encode them with the query encoder and write FAISS indexes, chunk stores and stored vectors")
+    parser.add_argument("--corpus-dir", required=True, help="one sub-directory per domain (.txt/.md files are chunked, .json/.jsonl records are used as chunks)")
+    parser.add_argument("--output-dir", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--domains", nargs="+", default=list(DOMAIN_FILES), choices=list(DOMAIN_FILES))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--overlap-words", type=int, default=40)
+    parser.add_argument("--full", action="store_true", help="re-encode every chunk instead of reusing stored vectors by content hash")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.workers > 1:
+        pool = multiprocessing.get_context("spawn").Pool(args.workers, initializer=initWorker)
+    else:
+        pool = None
+        initWorker()
+    try:
+        for domain in args.domains:
+            buildDomain(domain, args.corpus_dir, args.output_dir, args, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.services.index_builder import buildIndex, loadStoredVectors
+from app.services.rag_service import DOMAIN_FILES
+from app.services.unified_index import DOMAIN_ID_SHIFT, indexSignature, writeUnifiedIndex
+
+logger = logging.getLogger(__name__)
+
+
+def buildUnified(basePath, domains, indexType, params):
+    import faiss
+    import numpy as np
+
+    meta = {"version": 1, "indexType": indexType, "domainIdShift": DOMAIN_ID_SHIFT, "domains": {}}
+    blocks = []
+    for domainId, name in enumerate(DOMAIN_FILES):
+        if name not in domains:
+            continue
+        sourcePath = os.path.join(basePath, DOMAIN_FILES[name][0])
+        if not os.path.exists(sourcePath):
+            logger.warning(f"Skipping {name}: {sourcePath} not found")
+            continue
+        metric = faiss.read_index(sourcePath).metric_type
+        vectors = np.asarray(loadStoredVectors(sourcePath), dtype=np.float32)
+        if blocks and (vectors.shape[1] != blocks[0][1].shape[1] or metric != blocks[0][2]):
+            raise ValueError(f"{name} has dim {vectors.shape[1]} / metric {metric}, unified index needs every domain to match {blocks[0][0]}")
+        blocks.append((name, vectors, metric))
+        meta["domains"][name] = {"domainId": domainId, "ntotal": len(vectors), "source": indexSignature(sourcePath)}
+
+    if not blocks:
+        raise ValueError(f"No domain indexes found under {basePath}")
+
+    start = time.perf_counter()
+    allVectors = np.concatenate([vectors for _, vectors, _ in blocks])
+    allIds = np.concatenate([
+        (np.int64(meta["domains"][name]["domainId"]) << DOMAIN_ID_SHIFT) + np.arange(len(vectors), dtype=np.int64)
+        for name, vectors, _ in blocks
+    ])
+    base = buildIndex(allVectors, indexType, metric=blocks[0][2], params=params, addVectors=False)
+    index = faiss.IndexIDMap2(base)
+    index.add_with_ids(allVectors, allIds)
+    writeUnifiedIndex(index, meta, basePath)
+    logger.info(f"Built {indexType} unified index over {len(blocks)} domains / {index.ntotal} vectors in {time.perf_counter() - start:.1f}s")
+    return index
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build one FAISS index over every domain with domain-tagged vector ids")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--domains", nargs="+", default=list(DOMAIN_FILES), choices=list(DOMAIN_FILES))
+    parser.add_argument("--type", default="flat", choices=["flat", "hnsw", "ivf-flat"])
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--hnsw-m", type=int)
+    parser.add_argument("--ef-construction", type=int)
+    args = parser.parse_args()
+
+    params = {"nlist": args.nlist, "hnswM": args.hnsw_m, "efConstruction": args.ef_construction}
+    buildUnified(args.base_path, args.domains, args.type, {key: value for key, value in params.items() if value})
+    logger.info("Enable with FAISS_UNIFIED_INDEX=true")
+
+
+if __name__ == "__main__":
+    main()
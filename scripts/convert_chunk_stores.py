@@ -0,0 +1,53 @@
+import argparse
+import json
+import logging
+import os
+import pickle
+
+from app.core.config import settings
+from app.services.chunk_store import ChunkStore, chunkStorePath, sourceSignature, writeChunkStore
+from app.services.rag_service import DOMAIN_FILES
+
+logger = logging.getLogger(__name__)
+
+
+def loadSourceChunks(chunkPath):
+    if chunkPath.endswith(".pkl"):
+        with open(chunkPath, "rb") as f:
+            return pickle.load(f)
+    with open(chunkPath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convertChunkFile(chunkPath, verify=True):
+    storePath = chunkStorePath(chunkPath)
+    chunks = loadSourceChunks(chunkPath)
+    writeChunkStore(chunks, storePath, sourceSignature(chunkPath))
+    if verify:
+        store = ChunkStore(storePath)
+        mismatches = sum(1 for i, chunk in enumerate(chunks) if store[i] != chunk)
+        store.close()
+        if mismatches:
+            raise ValueError(f"{mismatches} chunks did not round-trip through {storePath}")
+    return storePath, len(chunks)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Convert pickle/JSON chunk lists into memory-mapped chunk stores")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--domains", nargs="*", default=list(DOMAIN_FILES))
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args()
+
+    for domain in args.domains:
+        chunkPath = os.path.join(args.base_path, DOMAIN_FILES[domain][1])
+        if not os.path.exists(chunkPath):
+            logger.warning(f"Skipping {domain}: {chunkPath} not found")
+            continue
+        storePath, count = convertChunkFile(chunkPath, verify=not args.no_verify)
+        logger.info(f"{domain}: {count} chunks -> {storePath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from app.services.rag_service import DOMAIN_FILES
+
+logger = logging.getLogger(__name__)
+
+
+def parseShardSpec(spec):
+    domains, _, indexesPath = spec.partition("@")
+    names = [] if domains in ("", "all") else domains.split(",")
+    unknown = [name for name in names if name not in DOMAIN_FILES]
+    if unknown:
+        raise ValueError(f"Unknown domains in shard spec {spec}: {', '.join(unknown)}")
+    return names, indexesPath or None
+
+
+def launchShards(specs, basePort=8101, host="127.0.0.1", extraEnv=None, timeoutSeconds=600.0):
+    """Starts one shard_main process per spec ("domain,domain[@indexesPath]") and waits until each answers /status"""
+    processes, urls = [], []
+    for position, spec in enumerate(specs):
+        domains, indexesPath = parseShardSpec(spec)
+        env = {**os.environ, **(extraEnv or {}), "RETRIEVAL_SHARD_DOMAINS": json.dumps(domains)}
+        if indexesPath:
+            env["FAISS_INDEXES_PATH"] = indexesPath
+        port = basePort + position
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "shard_main:app", "--host", host, "--port", str(port), "--log-level", "warning"],
+            env=env
+        ))
+        urls.append(f"http://{host}:{port}")
+    try:
+        waitForShards(urls, processes, timeoutSeconds)
+    except Exception:
+        stopShards(processes)
+        raise
+    return processes, urls
+
+
+def waitForShards(urls, processes, timeoutSeconds):
+    import httpx
+
+    deadline = time.monotonic() + timeoutSeconds
+    pending = list(zip(urls, processes))
+    while pending:
+        url, process = pending[0]
+        if process.poll() is not None:
+            raise RuntimeError(f"Shard {url} exited with code {process.returncode}")
+        try:
+            httpx.get(f"{url}/status", timeout=2.0).raise_for_status()
+            pending.pop(0)
+            continue
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Shard {url} did not come up within {timeoutSeconds}s")
+        time.sleep(0.5)
+
+
+def stopShards(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Launch local retrieval shard processes for RETRIEVAL_BACKEND=remote")
+    parser.add_argument("--shards", nargs="+", default=["constitution,ipcSections,ipcCase", "statutes,qaTexts,caseLaw"],
+                        help='one spec per shard: comma-separated domains ("all" for every domain), optionally "@<indexes dir>" for a partitioned corpus')
+    parser.add_argument("--base-port", type=int, default=8101)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    processes, urls = launchShards(args.shards, args.base_port, args.host)
+    print(f"RETRIEVAL_BACKEND=remote RETRIEVAL_SHARD_URLS='{json.dumps(urls)}'")
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        logger.error("A shard exited - stopping the rest")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopShards(processes)
+
+
+if __name__ == "__main__":
+    main()
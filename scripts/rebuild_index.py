@@ -0,0 +1,63 @@
+import argparse
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.services.index_builder import INDEX_TYPES, annIndexPath, buildIndex, loadStoredVectors, vectorsPath
+from app.services.rag_service import DOMAIN_FILES
+
+logger = logging.getLogger(__name__)
+
+
+def buildParams(args):
+    params = {
+        "nlist": args.nlist,
+        "pqM": args.pq_m,
+        "pqBits": args.pq_bits,
+        "hnswM": args.hnsw_m,
+        "efConstruction": args.ef_construction
+    }
+    return {key: value for key, value in params.items() if value}
+
+
+def rebuildDomain(basePath, domain, indexType, params):
+    import faiss
+    import numpy as np
+
+    sourcePath = os.path.join(basePath, DOMAIN_FILES[domain][0])
+    sourceIndex = faiss.read_index(sourcePath)
+    vectors = loadStoredVectors(sourcePath)
+    if not os.path.exists(vectorsPath(sourcePath)):
+        np.save(vectorsPath(sourcePath), vectors)
+        logger.info(f"Saved {len(vectors)} stored vectors to {vectorsPath(sourcePath)}")
+
+    start = time.perf_counter()
+    index = buildIndex(vectors, indexType, metric=sourceIndex.metric_type, params=params)
+    outputPath = annIndexPath(sourcePath, indexType)
+    faiss.write_index(index, f"{outputPath}.tmp")
+    os.replace(f"{outputPath}.tmp", outputPath)
+    logger.info(f"{domain}: built {indexType} over {index.ntotal} vectors in {time.perf_counter() - start:.1f}s -> {outputPath}")
+    return outputPath
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild a domain's FAISS index as HNSW / IVF-Flat / IVF-PQ / SQ8 / PQ from its stored vectors")
+    parser.add_argument("--base-path", default=settings.faiss_indexes_base_path)
+    parser.add_argument("--domains", nargs="+", required=True, choices=list(DOMAIN_FILES))
+    parser.add_argument("--type", required=True, choices=[t for t in INDEX_TYPES if t != "flat"])
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--pq-m", type=int)
+    parser.add_argument("--pq-bits", type=int)
+    parser.add_argument("--hnsw-m", type=int)
+    parser.add_argument("--ef-construction", type=int)
+    args = parser.parse_args()
+
+    for domain in args.domains:
+        rebuildDomain(args.base_path, domain, args.type, buildParams(args))
+    logger.info(f"Enable with FAISS_INDEX_TYPES='{{\"{args.domains[0]}\": \"{args.type}\"}}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import uvicorn
+from fastapi import FastAPI
+from app.api.shard_routes import router
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO)
+
+app = FastAPI(
+    title="Legal RAG Retrieval Shard",
+    description="Serves query encoding and FAISS retrieval for the domains in RETRIEVAL_SHARD_DOMAINS to API workers running with RETRIEVAL_BACKEND=remote",
+    version="1.0.0"
+)
+
+app.include_router(router)
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "shard_main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8101"))
+    )
@@ -0,0 +1,18 @@
+from app.services.fusion import fuseScores
+
+
+def test_sum_of_distances_ranks_ids_matched_by_more_passages_first():
+    fused = fuseScores([[(7, 0.5), (9, 0.6)], [(7, 0.5)], [(7, 0.5)]], 5, "sum", higherIsBetter=False)
+    assert [itemId for itemId, _ in fused] == [7, 9]
+    assert fused[0][1] < fused[1][1]
+    assert abs(fused[1][1] - 0.6) < 1e-9
+
+
+def test_max_of_distances_keeps_the_closest_match():
+    fused = fuseScores([[(7, 0.9), (9, 0.6)], [(7, 0.2)]], 5, "max", higherIsBetter=False)
+    assert fused == [(7, 0.2), (9, 0.6)]
+
+
+def test_sum_of_similarities():
+    fused = fuseScores([[(7, 0.5), (9, 0.6)], [(7, 0.5)]], 5, "sum")
+    assert fused == [(7, 1.0), (9, 0.6)]